@@ -67,6 +67,11 @@ class Action(BaseModel):
     class Config:
         use_enum_values = True
     
+    @property
+    def search_text(self) -> str:
+        """搜索用文字（名稱與說明的小寫合併）"""
+        return f"{self.name}\n{self.description or ''}".lower()
+    
     @property
     def type_name(self) -> str:
         """獲取動作類型中文名稱"""
@@ -100,6 +105,32 @@ class Action(BaseModel):
         self.last_execution_status = status
         self.updated_at = datetime.now()
     
+    def record_batch_execution(
+        self,
+        total: int,
+        success: int,
+        failure: int,
+        status: str = "",
+        executed_at: Optional[datetime] = None
+    ):
+        """
+        一次性記錄批量執行結果（取代逐欄位修改）
+        
+        Args:
+            total: 執行設備總數
+            success: 成功數
+            failure: 失敗數
+            status: 執行狀態描述
+            executed_at: 執行時間（預設為現在）
+        """
+        executed_at = executed_at or datetime.now()
+        self.execution_count += total
+        self.success_count += success
+        self.failure_count += failure
+        self.last_executed_at = executed_at
+        self.last_execution_status = status
+        self.updated_at = executed_at
+    
     def to_dict(self) -> Dict[str, Any]:
         """轉換為字典（用於儲存）"""
         data = self.model_dump(exclude_none=False)
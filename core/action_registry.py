@@ -1,7 +1,8 @@
 """
 動作註冊管理器
 """
-from typing import List, Optional, Dict, Any
+import threading
+from typing import List, Optional, Dict, Any, Tuple
 from tinydb import TinyDB, Query
 from pathlib import Path
 from core.action import Action, ActionType, ActionParamsValidator
@@ -27,8 +28,63 @@ class ActionRegistry:
         self.db_path = db_path
         self.db = TinyDB(db_path)
         self.actions_table = self.db.table('actions')
+        # 實例由所有 session 共用：TinyDB 不是執行緒安全的，寫入與聚合計數的更新以鎖保護
+        self._lock = threading.RLock()
+        # 聚合計數：action_id -> (執行次數, 成功次數)，首次存取時從資料庫載入，
+        # 之後在新增/更新/刪除時增量維護，避免每次重新執行都遍歷所有動作
+        self._exec_stats: Optional[Dict[str, Tuple[int, int]]] = None
+        self._total_exec = 0
+        self._total_success = 0
         logger.info(f"動作註冊管理器已初始化，資料庫路徑: {db_path}")
     
+    def _ensure_stats(self) -> Dict[str, Tuple[int, int]]:
+        """確保聚合計數已載入"""
+        with self._lock:
+            if self._exec_stats is None:
+                self._exec_stats = {}
+                self._total_exec = 0
+                self._total_success = 0
+                for data in self.actions_table.all():
+                    self._set_stats(
+                        data.get('action_id'),
+                        data.get('execution_count', 0),
+                        data.get('success_count', 0)
+                    )
+            return self._exec_stats
+    
+    def _set_stats(self, action_id: str, executions: int, success: int):
+        """更新單一動作的計數並同步調整總數"""
+        stats = self._exec_stats
+        if stats is None:
+            return
+        old_exec, old_success = stats.get(action_id, (0, 0))
+        stats[action_id] = (executions, success)
+        self._total_exec += executions - old_exec
+        self._total_success += success - old_success
+    
+    def _drop_stats(self, action_id: str):
+        """移除單一動作的計數"""
+        stats = self._exec_stats
+        if stats is None or action_id not in stats:
+            return
+        old_exec, old_success = stats.pop(action_id)
+        self._total_exec -= old_exec
+        self._total_success -= old_success
+    
+    def count(self) -> int:
+        """動作總數"""
+        return len(self._ensure_stats())
+    
+    def total_executions(self) -> int:
+        """所有動作的總執行次數"""
+        self._ensure_stats()
+        return self._total_exec
+    
+    def total_success(self) -> int:
+        """所有動作的總成功次數"""
+        self._ensure_stats()
+        return self._total_success
+    
     def create_action(
         self,
         name: str,
@@ -48,30 +104,32 @@ class ActionRegistry:
         Returns:
             Action 對象，失敗返回 None
         """
-        try:
-            # 驗證參數
-            is_valid, error_msg = ActionParamsValidator.validate(action_type, params)
-            if not is_valid:
-                logger.error(f"參數驗證失敗: {error_msg}")
-                return None
+        with self._lock:
+            try:
+                # 驗證參數
+                is_valid, error_msg = ActionParamsValidator.validate(action_type, params)
+                if not is_valid:
+                    logger.error(f"參數驗證失敗: {error_msg}")
+                    return None
+                
+                # 創建動作
+                action = Action(
+                    name=name,
+                    action_type=action_type,
+                    params=params,
+                    description=description
+                )
+                
+                # 儲存到資料庫
+                self.actions_table.insert(action.to_dict())
+                self._set_stats(action.action_id, action.execution_count, action.success_count)
+                logger.info(f"✅ 創建動作成功: {action.display_name} (ID: {action.action_id})")
+                
+                return action
             
-            # 創建動作
-            action = Action(
-                name=name,
-                action_type=action_type,
-                params=params,
-                description=description
-            )
-            
-            # 儲存到資料庫
-            self.actions_table.insert(action.to_dict())
-            logger.info(f"✅ 創建動作成功: {action.display_name} (ID: {action.action_id})")
-            
-            return action
-        
-        except Exception as e:
-            logger.error(f"❌ 創建動作失敗: {e}")
-            return None
+            except Exception as e:
+                logger.error(f"❌ 創建動作失敗: {e}")
+                return None
     
     def get_action(self, action_id: str) -> Optional[Action]:
         """
@@ -144,30 +202,32 @@ class ActionRegistry:
         Returns:
             是否成功
         """
-        try:
-            # 驗證參數
-            is_valid, error_msg = ActionParamsValidator.validate(action.action_type, action.params)
-            if not is_valid:
-                logger.error(f"參數驗證失敗: {error_msg}")
-                return False
-            
-            # 更新時間戳
-            from datetime import datetime
-            action.updated_at = datetime.now()
-            
-            # 更新資料庫
-            ActionQuery = Query()
-            self.actions_table.update(
-                action.to_dict(),
-                ActionQuery.action_id == action.action_id
-            )
+        with self._lock:
+            try:
+                # 驗證參數
+                is_valid, error_msg = ActionParamsValidator.validate(action.action_type, action.params)
+                if not is_valid:
+                    logger.error(f"參數驗證失敗: {error_msg}")
+                    return False
+                
+                # 更新時間戳
+                from datetime import datetime
+                action.updated_at = datetime.now()
+                
+                # 更新資料庫
+                ActionQuery = Query()
+                self.actions_table.update(
+                    action.to_dict(),
+                    ActionQuery.action_id == action.action_id
+                )
+                self._set_stats(action.action_id, action.execution_count, action.success_count)
+                
+                logger.info(f"✅ 更新動作成功: {action.display_name} (ID: {action.action_id})")
+                return True
             
-            logger.info(f"✅ 更新動作成功: {action.display_name} (ID: {action.action_id})")
-            return True
-        
-        except Exception as e:
-            logger.error(f"❌ 更新動作失敗 (ID: {action.action_id}): {e}")
-            return False
+            except Exception as e:
+                logger.error(f"❌ 更新動作失敗 (ID: {action.action_id}): {e}")
+                return False
     
     def delete_action(self, action_id: str) -> bool:
         """
@@ -179,20 +239,22 @@ class ActionRegistry:
         Returns:
             是否成功
         """
-        try:
-            ActionQuery = Query()
-            result = self.actions_table.remove(ActionQuery.action_id == action_id)
+        with self._lock:
+            try:
+                ActionQuery = Query()
+                result = self.actions_table.remove(ActionQuery.action_id == action_id)
+                
+                if result:
+                    self._drop_stats(action_id)
+                    logger.info(f"✅ 刪除動作成功 (ID: {action_id})")
+                    return True
+                else:
+                    logger.warning(f"⚠️ 動作不存在 (ID: {action_id})")
+                    return False
             
-            if result:
-                logger.info(f"✅ 刪除動作成功 (ID: {action_id})")
-                return True
-            else:
-                logger.warning(f"⚠️ 動作不存在 (ID: {action_id})")
+            except Exception as e:
+                logger.error(f"❌ 刪除動作失敗 (ID: {action_id}): {e}")
                 return False
-        
-        except Exception as e:
-            logger.error(f"❌ 刪除動作失敗 (ID: {action_id}): {e}")
-            return False
     
     def search_actions(self, keyword: str) -> List[Action]:
         """
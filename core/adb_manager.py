@@ -13,6 +13,27 @@ from config.settings import ADB_DEFAULT_PORT, ADB_CONNECTION_TIMEOUT
 
 logger = get_logger(__name__)
 
+# 批量操作共用執行緒池大小
+BATCH_POOL_SIZE = 16
+
+# Intent Extras 的 am 參數 flag（依值的確切類型分派，bool 不會被當成 int；未列出的類型視為字串）
+_INTENT_EXTRA_FLAGS = {
+    bool: "--ez",
+    int: "--ei",
+    float: "--ef",
+    str: "--es",
+}
+
+
+def _format_intent_extra(key: str, value: Any) -> str:
+    """將單個 Intent Extra 格式化為 am 命令參數片段"""
+    flag = _INTENT_EXTRA_FLAGS.get(type(value), "--es")
+    if flag == "--ez":
+        return f" --ez {key} {'true' if value else 'false'}"
+    if flag == "--es":
+        return f" --es {key} \"{value}\""
+    return f" {flag} {key} {value}"
+
 
 class ADBManager:
     """ADB 管理器類別"""
@@ -23,6 +44,12 @@ class ADBManager:
         self._devices_cache: Optional[List[Dict[str, str]]] = None
         self._devices_cache_time: float = 0
         self._devices_cache_ttl: float = 1.0  # 緩存有效期（秒）
+        # 批量操作共用的執行緒池（避免每次批量調用都重新建立執行緒）
+        self._pool = ThreadPoolExecutor(max_workers=BATCH_POOL_SIZE, thread_name_prefix='adb')
+        # scrcpy 可用性（只緩存可用的結果，未安裝時每次重新檢查）
+        self._scrcpy_available: bool = False
+        # 已啟動的 scrcpy 進程 {device: Popen}
+        self._scrcpy_processes: Dict[str, subprocess.Popen] = {}
     
     def _check_adb_available(self) -> bool:
         """檢查 ADB 是否可用"""
@@ -321,7 +348,7 @@ class ADBManager:
         
         Args:
             devices: 設備列表 [(ip, port), ...]
-            max_workers: 最大並發數（默認 10）
+            max_workers: 最大並發數（默認 10，受共用執行緒池大小 BATCH_POOL_SIZE 限制）
             progress_callback: 進度回調函數 callback(completed, total)
         
         Returns:
@@ -344,30 +371,29 @@ class ADBManager:
         logger.info(f"🔌 開始並發連接: {total} 台設備（並發數：{max_workers}）")
         
         try:
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # 提交所有任務
-                future_to_device = {
-                    executor.submit(self.connect, ip, port): (ip, port)
-                    for ip, port in devices
-                }
+            # 提交所有任務到共用執行緒池
+            future_to_device = {
+                self._pool.submit(self.connect, ip, port): (ip, port)
+                for ip, port in devices
+            }
+            
+            # 收集結果（按完成順序，不保證原始順序）
+            for future in as_completed(future_to_device):
+                ip, port = future_to_device[future]
+                connection_str = f"{ip}:{port}"
+                try:
+                    success, message = future.result()
+                    results.append((connection_str, success, message))
+                except Exception as e:
+                    logger.error(f"❌ 連接異常: {connection_str} - {e}")
+                    results.append((connection_str, False, f"連接異常: {str(e)}"))
                 
-                # 收集結果（按完成順序，不保證原始順序）
-                for future in as_completed(future_to_device):
-                    ip, port = future_to_device[future]
-                    connection_str = f"{ip}:{port}"
+                completed += 1
+                if progress_callback:
                     try:
-                        success, message = future.result()
-                        results.append((connection_str, success, message))
+                        progress_callback(completed, total)
                     except Exception as e:
-                        logger.error(f"❌ 連接異常: {connection_str} - {e}")
-                        results.append((connection_str, False, f"連接異常: {str(e)}"))
-                    
-                    completed += 1
-                    if progress_callback:
-                        try:
-                            progress_callback(completed, total)
-                        except Exception as e:
-                            logger.warning(f"進度回調失敗: {e}")
+                        logger.warning(f"進度回調失敗: {e}")
             
             logger.info(f"✅ 並發連接完成: {completed}/{total}")
             return results
@@ -564,7 +590,9 @@ class ADBManager:
         )
     
     def check_scrcpy_available(self) -> bool:
-        """檢查 scrcpy 是否可用"""
+        """檢查 scrcpy 是否可用（確認可用後不再重複執行 scrcpy --version）"""
+        if self._scrcpy_available:
+            return True
         try:
             result = subprocess.run(
                 ['scrcpy', '--version'],
@@ -572,10 +600,29 @@ class ADBManager:
                 text=True,
                 timeout=5
             )
-            return result.returncode == 0
+            self._scrcpy_available = result.returncode == 0
+            return self._scrcpy_available
         except (subprocess.TimeoutExpired, FileNotFoundError):
             return False
     
+    def get_scrcpy_exit_code(self, device: str) -> Optional[int]:
+        """
+        查詢 scrcpy 進程是否已結束（非阻塞）
+        
+        Args:
+            device: 設備序列號或 IP:Port
+        
+        Returns:
+            進程的結束碼；仍在運行或沒有啟動記錄時返回 None
+        """
+        process = self._scrcpy_processes.get(device)
+        if process is None:
+            return None
+        exit_code = process.poll()
+        if exit_code is not None:
+            del self._scrcpy_processes[device]
+        return exit_code
+    
     def start_scrcpy(
         self, 
         device: str, 
@@ -679,7 +726,7 @@ class ADBManager:
             # 啟動 scrcpy（非阻塞）
             logger.info(f"啟動 scrcpy: {' '.join(cmd)}")
             
-            subprocess.Popen(
+            self._scrcpy_processes[device] = subprocess.Popen(
                 cmd,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
@@ -714,20 +761,12 @@ class ADBManager:
             device: 設備序列號
             package: 套件名稱
             activity: Activity 名稱 (e.g., .MainActivity)
-            extras: 參數字典 (支援 str, int, bool)
+            extras: 參數字典 (支援 str, int, float, bool；其他類型以字串傳遞)
         """
-        cmd = f"am start -n {package}/{activity}"
+        parts = [f"am start -n {package}/{activity}"]
+        parts.extend(_format_intent_extra(key, value) for key, value in extras.items())
         
-        for key, value in extras.items():
-            if isinstance(value, int):
-                cmd += f" --ei {key} {value}"
-            elif isinstance(value, bool):
-                cmd += f" --ez {key} {'true' if value else 'false'}"
-            else:
-                # 預設為字串
-                cmd += f" --es {key} \"{str(value)}\""
-                
-        return self.execute_shell_command(cmd, device)
+        return self.execute_shell_command("".join(parts), device)
     
     def stop_app(self, device: str, package: str) -> Tuple[bool, str]:
         """關閉應用程式"""
@@ -744,13 +783,12 @@ class ADBManager:
         extras: Optional[Dict[str, str]] = None
     ) -> Tuple[bool, str]:
         """發送廣播訊息"""
-        cmd = f"am broadcast -a {package}.{action}"
+        parts = [f"am broadcast -a {package}.{action}"]
         
         if extras:
-            for key, value in extras.items():
-                cmd += f" --es {key} \"{value}\""
+            parts.extend(f" --es {key} \"{value}\"" for key, value in extras.items())
         
-        return self.execute_shell_command(cmd, device)
+        return self.execute_shell_command("".join(parts), device)
     
     def install_apk(self, device: str, apk_path: str) -> Tuple[bool, str]:
         """安裝 APK"""
@@ -1552,7 +1590,8 @@ class ADBManager:
         action,
         max_workers: int = 10,
         progress_callback: Optional[Callable[[int, int], None]] = None,
-        room_info: Optional[Dict[str, Any]] = None
+        room_info: Optional[Dict[str, Any]] = None,
+        result_callback: Optional[Callable[[str, bool, str], None]] = None
     ) -> List[Tuple[str, bool, str]]:
         """
         並發執行動作到多個設備（大幅提升批量操作速度）
@@ -1560,8 +1599,11 @@ class ADBManager:
         Args:
             devices: 設備列表 (connection_string)
             action: Action 對象
-            max_workers: 最大並發數（默認 10）
+            max_workers: 最大並發數（默認 10，受共用執行緒池大小 BATCH_POOL_SIZE 限制）
             progress_callback: 進度回調函數 callback(completed, total)
+            room_info: 房間信息（可選）
+            result_callback: 單一設備結果回調 callback(device, success, message)，
+                每個設備完成時立即調用，可用於逐步更新 UI
         
         Returns:
             [(device, success, message), ...]
@@ -1583,30 +1625,36 @@ class ADBManager:
         logger.info(f"🚀 開始並發執行: {action.display_name} -> {total} 台設備（並發數：{max_workers}）")
         
         try:
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # 提交所有任務
-                future_to_device = {
-                    executor.submit(self.execute_action, device, action, room_info): device
-                    for device in devices
-                }
+            # 提交所有任務到共用執行緒池
+            future_to_device = {
+                self._pool.submit(self.execute_action, device, action, room_info): device
+                for device in devices
+            }
+            
+            # 收集結果（按完成順序，不保證原始順序）
+            for future in as_completed(future_to_device):
+                device = future_to_device[future]
+                try:
+                    success, message = future.result()
+                except Exception as e:
+                    logger.error(f"❌ 設備執行異常: {device} - {e}")
+                    success, message = False, f"執行異常: {e}"
+                results.append((device, success, message))
                 
-                # 收集結果（按完成順序，不保證原始順序）
-                for future in as_completed(future_to_device):
-                    device = future_to_device[future]
+                # 結果回調
+                if result_callback:
                     try:
-                        success, message = future.result()
-                        results.append((device, success, message))
+                        result_callback(device, success, message)
                     except Exception as e:
-                        logger.error(f"❌ 設備執行異常: {device} - {e}")
-                        results.append((device, False, f"執行異常: {e}"))
-                    
-                    # 進度回調
-                    completed += 1
-                    if progress_callback:
-                        try:
-                            progress_callback(completed, total)
-                        except Exception as e:
-                            logger.warning(f"進度回調失敗: {e}")
+                        logger.warning(f"結果回調失敗: {e}")
+                
+                # 進度回調
+                completed += 1
+                if progress_callback:
+                    try:
+                        progress_callback(completed, total)
+                    except Exception as e:
+                        logger.warning(f"進度回調失敗: {e}")
             
             logger.info(f"✅ 並發執行完成: {action.display_name} ({completed}/{total})")
             return results
@@ -1685,6 +1733,34 @@ class ADBManager:
             logger.error(f"❌ 並發查詢失敗: {e}")
             return status_dict
     
+    def get_device_status_batch(self, devices: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        以單一事件迴圈並發獲取多個設備的狀態
+        
+        每台設備只啟動一個 adb 子進程（複合 shell 命令），
+        所有設備的查詢透過 asyncio.gather 同時進行，總耗時接近最慢的一台設備。
+        
+        Args:
+            devices: 設備列表 (connection_string)
+        
+        Returns:
+            {device: status_dict, ...}（status_dict 格式同 get_device_status）
+        """
+        if not devices:
+            return {}
+        
+        async def _gather():
+            return await asyncio.gather(
+                *[self.get_device_status_async(device) for device in devices]
+            )
+        
+        try:
+            results = asyncio.run(_gather())
+            return dict(zip(devices, results))
+        except Exception as e:
+            logger.error(f"❌ 並發查詢失敗: {e}")
+            return {}
+    
     def start_scrcpy_batch(
         self,
         devices: List[Tuple[str, str]],
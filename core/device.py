@@ -58,9 +58,14 @@ class Device(BaseModel):
     @property
     def connection_string(self) -> str:
         """取得連接字串"""
+        return self.endpoint or self.serial
+    
+    @property
+    def endpoint(self) -> str:
+        """取得網路端點（ip:port），未設定 IP 時返回空字串"""
         if self.ip:
             return f"{self.ip}:{self.port}"
-        return self.serial
+        return ""
     
     @property
     def display_name(self) -> str:
@@ -1,6 +1,7 @@
 import subprocess
 import os
 import socket
+import time
 import logging
 from typing import Dict, Optional
 from pathlib import Path
@@ -92,6 +93,30 @@ class GameServerManager:
             }
         return None
 
+    def wait_until_ready(self, room_id: str, timeout: float = 5.0) -> bool:
+        """
+        等待 Server 開始接受連線（輪詢 Port，取代固定時間的等待）
+        Returns: 在逾時前可連線返回 True；進程已結束或逾時返回 False
+        """
+        port = self.ports.get(room_id)
+        if port is None:
+            return False
+        
+        proc = self.processes[room_id]
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                logger.error(f"Game Server 已結束 (Room: {room_id}, 退出碼: {proc.returncode})")
+                return False
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.settimeout(0.05)
+                if s.connect_ex(('localhost', port)) == 0:
+                    return True
+            time.sleep(0.02)
+        
+        logger.warning(f"等待 Game Server 就緒逾時 (Room: {room_id}, Port: {port})")
+        return False
+
     def _find_available_port(self, start_port: int = 3001, end_port: int = 3100) -> Optional[int]:
         """尋找可用 Port"""
         for port in range(start_port, end_port):
@@ -124,6 +124,16 @@ class Room(BaseModel):
         else:
             return f"{self.device_count}/{self.max_devices}"
     
+    @property
+    def parameters_revision(self) -> str:
+        """
+        參數版本標記
+        
+        RoomRegistry.update_room 每次持久化都會更新 updated_at，
+        因此可作為從資料庫載入的房間參數之快取鍵
+        """
+        return f"{self.room_id}:{self.updated_at.isoformat()}"
+    
     def add_device(self, device_id: str) -> bool:
         """
         添加設備到房間
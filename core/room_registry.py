@@ -1,6 +1,7 @@
 """
 房間註冊管理器
 """
+import threading
 from typing import List, Optional, Dict, Any, Tuple
 from tinydb import TinyDB, Query
 from pathlib import Path
@@ -27,8 +28,18 @@ class RoomRegistry:
         self.db_path = db_path
         self.db = TinyDB(db_path)
         self.rooms_table = self.db.table('rooms')
+        # 實例由所有 session 共用：TinyDB 不是執行緒安全的，寫入與版本號更新以鎖保護
+        # （可重入：add_device_to_room 等會在持有鎖時呼叫 update_room）
+        self._lock = threading.RLock()
+        # 資料版本號：每次寫入（新增/更新/刪除）時遞增，供 UI 作為快取鍵
+        self._version = 0
         logger.info(f"房間註冊管理器已初始化，資料庫路徑: {db_path}")
     
+    @property
+    def version(self) -> int:
+        """資料版本號（此註冊管理器每次寫入房間資料時遞增）"""
+        return self._version
+    
     def create_room(
         self,
         name: str,
@@ -50,30 +61,32 @@ class RoomRegistry:
         Returns:
             Room 對象，失敗返回 None
         """
-        try:
-            # 檢查名稱是否已存在
-            if self.get_room_by_name(name):
-                logger.error(f"房間名稱已存在: {name}")
-                return None
-            
-            # 創建房間
-            room = Room(
-                name=name,
-                description=description,
-                max_devices=max_devices,
-                socket_ip=socket_ip,
-                socket_port=socket_port
-            )
-            
-            # 儲存到資料庫
-            self.rooms_table.insert(room.to_dict())
-            logger.info(f"✅ 創建房間成功: {room.display_name} (ID: {room.room_id})")
+        with self._lock:
+            try:
+                # 檢查名稱是否已存在
+                if self.get_room_by_name(name):
+                    logger.error(f"房間名稱已存在: {name}")
+                    return None
+                
+                # 創建房間
+                room = Room(
+                    name=name,
+                    description=description,
+                    max_devices=max_devices,
+                    socket_ip=socket_ip,
+                    socket_port=socket_port
+                )
+                
+                # 儲存到資料庫
+                self.rooms_table.insert(room.to_dict())
+                self._version += 1
+                logger.info(f"✅ 創建房間成功: {room.display_name} (ID: {room.room_id})")
+                
+                return room
             
-            return room
-        
-        except Exception as e:
-            logger.error(f"❌ 創建房間失敗: {e}")
-            return None
+            except Exception as e:
+                logger.error(f"❌ 創建房間失敗: {e}")
+                return None
     
     def get_room(self, room_id: str) -> Optional[Room]:
         """
@@ -148,24 +161,26 @@ class RoomRegistry:
         Returns:
             是否成功
         """
-        try:
-            # 更新時間戳
-            from datetime import datetime
-            room.updated_at = datetime.now()
-            
-            # 更新資料庫
-            RoomQuery = Query()
-            self.rooms_table.update(
-                room.to_dict(),
-                RoomQuery.room_id == room.room_id
-            )
+        with self._lock:
+            try:
+                # 更新時間戳
+                from datetime import datetime
+                room.updated_at = datetime.now()
+                
+                # 更新資料庫
+                RoomQuery = Query()
+                self.rooms_table.update(
+                    room.to_dict(),
+                    RoomQuery.room_id == room.room_id
+                )
+                self._version += 1
+                
+                logger.info(f"✅ 更新房間成功: {room.display_name} (ID: {room.room_id})")
+                return True
             
-            logger.info(f"✅ 更新房間成功: {room.display_name} (ID: {room.room_id})")
-            return True
-        
-        except Exception as e:
-            logger.error(f"❌ 更新房間失敗 (ID: {room.room_id}): {e}")
-            return False
+            except Exception as e:
+                logger.error(f"❌ 更新房間失敗 (ID: {room.room_id}): {e}")
+                return False
     
     def delete_room(self, room_id: str) -> bool:
         """
@@ -177,20 +192,22 @@ class RoomRegistry:
         Returns:
             是否成功
         """
-        try:
-            RoomQuery = Query()
-            result = self.rooms_table.remove(RoomQuery.room_id == room_id)
+        with self._lock:
+            try:
+                RoomQuery = Query()
+                result = self.rooms_table.remove(RoomQuery.room_id == room_id)
+                
+                if result:
+                    self._version += 1
+                    logger.info(f"✅ 刪除房間成功 (ID: {room_id})")
+                    return True
+                else:
+                    logger.warning(f"⚠️ 房間不存在 (ID: {room_id})")
+                    return False
             
-            if result:
-                logger.info(f"✅ 刪除房間成功 (ID: {room_id})")
-                return True
-            else:
-                logger.warning(f"⚠️ 房間不存在 (ID: {room_id})")
+            except Exception as e:
+                logger.error(f"❌ 刪除房間失敗 (ID: {room_id}): {e}")
                 return False
-        
-        except Exception as e:
-            logger.error(f"❌ 刪除房間失敗 (ID: {room_id}): {e}")
-            return False
     
     def add_device_to_room(self, room_id: str, device_id: str) -> Tuple[bool, str]:
         """
@@ -203,39 +220,40 @@ class RoomRegistry:
         Returns:
             (成功, 訊息)
         """
-        try:
-            # 獲取房間
-            room = self.get_room(room_id)
-            if not room:
-                return False, "房間不存在"
-            
-            # 檢查是否已滿
-            if room.is_full:
-                return False, f"房間已滿 ({room.capacity_text})"
-            
-            # 檢查設備是否已在其他房間
-            current_room = self.get_device_room(device_id)
-            if current_room:
-                # 從當前房間移除
-                current_room.remove_device(device_id)
-                self.update_room(current_room)
-                logger.info(f"設備 {device_id} 已從房間 {current_room.name} 移出")
-            
-            # 添加到新房間
-            if room.add_device(device_id):
-                self.update_room(room)
-                logger.info(f"✅ 設備 {device_id} 已添加到房間 {room.name}")
+        with self._lock:
+            try:
+                # 獲取房間
+                room = self.get_room(room_id)
+                if not room:
+                    return False, "房間不存在"
+                
+                # 檢查是否已滿
+                if room.is_full:
+                    return False, f"房間已滿 ({room.capacity_text})"
                 
+                # 檢查設備是否已在其他房間
+                current_room = self.get_device_room(device_id)
                 if current_room:
-                    return True, f"設備已從「{current_room.name}」轉移到「{room.name}」"
+                    # 從當前房間移除
+                    current_room.remove_device(device_id)
+                    self.update_room(current_room)
+                    logger.info(f"設備 {device_id} 已從房間 {current_room.name} 移出")
+                
+                # 添加到新房間
+                if room.add_device(device_id):
+                    self.update_room(room)
+                    logger.info(f"✅ 設備 {device_id} 已添加到房間 {room.name}")
+                    
+                    if current_room:
+                        return True, f"設備已從「{current_room.name}」轉移到「{room.name}」"
+                    else:
+                        return True, f"設備已添加到「{room.name}」"
                 else:
-                    return True, f"設備已添加到「{room.name}」"
-            else:
-                return False, "添加設備失敗"
-        
-        except Exception as e:
-            logger.error(f"❌ 添加設備到房間失敗: {e}")
-            return False, f"添加失敗: {str(e)}"
+                    return False, "添加設備失敗"
+            
+            except Exception as e:
+                logger.error(f"❌ 添加設備到房間失敗: {e}")
+                return False, f"添加失敗: {str(e)}"
     
     def remove_device_from_room(self, room_id: str, device_id: str) -> Tuple[bool, str]:
         """
@@ -248,23 +266,24 @@ class RoomRegistry:
         Returns:
             (成功, 訊息)
         """
-        try:
-            # 獲取房間
-            room = self.get_room(room_id)
-            if not room:
-                return False, "房間不存在"
+        with self._lock:
+            try:
+                # 獲取房間
+                room = self.get_room(room_id)
+                if not room:
+                    return False, "房間不存在"
+                
+                # 移除設備
+                if room.remove_device(device_id):
+                    self.update_room(room)
+                    logger.info(f"✅ 設備 {device_id} 已從房間 {room.name} 移出")
+                    return True, f"設備已從「{room.name}」移出"
+                else:
+                    return False, "設備不在此房間內"
             
-            # 移除設備
-            if room.remove_device(device_id):
-                self.update_room(room)
-                logger.info(f"✅ 設備 {device_id} 已從房間 {room.name} 移出")
-                return True, f"設備已從「{room.name}」移出"
-            else:
-                return False, "設備不在此房間內"
-        
-        except Exception as e:
-            logger.error(f"❌ 從房間移除設備失敗: {e}")
-            return False, f"移除失敗: {str(e)}"
+            except Exception as e:
+                logger.error(f"❌ 從房間移除設備失敗: {e}")
+                return False, f"移除失敗: {str(e)}"
     
     def get_device_room(self, device_id: str) -> Optional[Room]:
         """
@@ -296,7 +315,7 @@ class RoomRegistry:
             device_registry: DeviceRegistry 實例
         
         Returns:
-            Device 列表
+            Device 列表（按 sort_order 排序，與設備管理頁面一致）
         """
         try:
             room = self.get_room(room_id)
@@ -309,12 +328,48 @@ class RoomRegistry:
                 if device:
                     devices.append(device)
             
+            devices.sort(key=lambda d: d.sort_order)
             return devices
         
         except Exception as e:
             logger.error(f"❌ 獲取房間設備失敗: {e}")
             return []
     
+    def get_all_room_devices(self, device_registry, rooms: Optional[List[Room]] = None) -> Dict[str, List]:
+        """
+        一次取得所有房間的設備對象
+        
+        只讀取一次設備資料庫並依成員關係分組，取代對每個房間呼叫 get_room_devices
+        （每個房間一次房間查詢 + 每台設備一次設備查詢）
+        
+        Args:
+            device_registry: DeviceRegistry 實例
+            rooms: 已取得的房間列表，None 時從資料庫讀取
+        
+        Returns:
+            {room_id: Device 列表}（按 sort_order 排序，與 get_room_devices 一致）
+        """
+        try:
+            if rooms is None:
+                rooms = self.get_all_rooms()
+            
+            result: Dict[str, List] = {room.room_id: [] for room in rooms}
+            member_of: Dict[str, List[str]] = {}
+            for room in rooms:
+                for device_id in room.device_ids:
+                    member_of.setdefault(device_id, []).append(room.room_id)
+            
+            # get_all_devices 已按 sort_order 排序，依序放入即保持順序
+            for device in device_registry.get_all_devices():
+                for room_id in member_of.get(device.device_id, ()):
+                    result[room_id].append(device)
+            
+            return result
+        
+        except Exception as e:
+            logger.error(f"❌ 獲取所有房間設備失敗: {e}")
+            return {}
+    
     def get_statistics(self) -> Dict[str, Any]:
         """
         獲取統計信息
@@ -325,13 +380,20 @@ class RoomRegistry:
         try:
             all_rooms = self.get_all_rooms()
             
-            total_devices = sum(room.device_count for room in all_rooms)
+            # 單次遍歷同時累計設備總數與有設備的房間數，空房間數由總數推得
+            total_devices = 0
+            rooms_with_devices = 0
+            for room in all_rooms:
+                device_count = room.device_count
+                total_devices += device_count
+                if device_count > 0:
+                    rooms_with_devices += 1
             
             stats = {
                 "total_rooms": len(all_rooms),
                 "total_devices": total_devices,
-                "rooms_with_devices": len([r for r in all_rooms if r.device_count > 0]),
-                "empty_rooms": len([r for r in all_rooms if r.device_count == 0]),
+                "rooms_with_devices": rooms_with_devices,
+                "empty_rooms": len(all_rooms) - rooms_with_devices,
             }
             
             return stats
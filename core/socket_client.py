@@ -4,6 +4,8 @@ Socket Client - 連接到房間的 Node.js Socket Server
 import socket
 import json
 import time
+import asyncio
+from collections import deque
 from typing import Optional, Tuple, List
 from pathlib import Path
 from utils.logger import get_logger
@@ -44,6 +46,8 @@ class SocketClient:
                 return True, "已連接"
             
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # 關閉 Nagle 演算法：命令都是小封包且發送後立即等待響應，避免延遲確認造成的額外等待
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self.socket.settimeout(timeout)
             self.socket.connect((self.socket_ip, self.socket_port))
             self.connected = True
@@ -154,6 +158,30 @@ class SocketClient:
         except Exception as e:
             logger.error(f"斷開連接失敗: {e}")
     
+    def _discard_pending(self) -> bool:
+        """
+        以非阻塞方式讀取並丟棄緩衝區中尚未讀取的數據
+        
+        Returns:
+            連線是否仍然有效（對方已關閉連線時返回 False）
+        """
+        # 保存 connect() 設定的超時，結束後還原（setblocking(True) 會清除超時，之後的 sendall 可能無限阻塞）
+        saved_timeout = self.socket.gettimeout()
+        try:
+            self.socket.setblocking(False)
+            while True:
+                chunk = self.socket.recv(4096)
+                if not chunk:
+                    return False
+                logger.debug(f"丟棄未讀取的消息: {len(chunk)} bytes")
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError:
+            return False
+        finally:
+            if self.socket:
+                self.socket.settimeout(saved_timeout)
+    
     def send_command(self, command: str, data: Optional[dict] = None) -> Tuple[bool, dict]:
         """
         發送命令到 Socket Server
@@ -163,13 +191,19 @@ class SocketClient:
             data: 額外的數據（可選）
         
         Returns:
-            (成功, 響應字典)
+            (成功, 響應字典)；失敗時響應字典的 'sent' 表示命令是否已送出，
+            為 False 時命令確定沒有到達服務器，可以安全重試
         """
+        sent = False
         try:
+            # 重用連線時先檢查連線是否仍然有效，並丟棄尚未讀取的推送消息
+            if self.connected and self.socket and not self._discard_pending():
+                self.disconnect()
+            
             if not self.connected or not self.socket:
                 success, msg = self.connect()
                 if not success:
-                    return False, {'type': 'error', 'message': msg}
+                    return False, {'type': 'error', 'message': msg, 'sent': False}
             
             # 構建消息
             message = {
@@ -180,6 +214,7 @@ class SocketClient:
             # 發送消息（JSON 格式，以換行符結尾）
             message_str = json.dumps(message) + '\n'
             self.socket.sendall(message_str.encode('utf-8'))
+            sent = True
             
             logger.debug(f"發送命令: {command}")
             
@@ -208,16 +243,98 @@ class SocketClient:
                     logger.debug(f"收到響應: {response}")
                     return True, response
                 except json.JSONDecodeError:
-                    return False, {'type': 'error', 'message': f'無效的響應格式: {response_str}'}
+                    return False, {'type': 'error', 'message': f'無效的響應格式: {response_str}', 'sent': True}
             else:
-                return False, {'type': 'error', 'message': '未收到響應'}
+                return False, {'type': 'error', 'message': '未收到響應', 'sent': True}
         
         except socket.timeout:
-            return False, {'type': 'error', 'message': '接收響應超時'}
+            return False, {'type': 'error', 'message': '接收響應超時' if sent else '發送命令超時', 'sent': sent}
+        except Exception as e:
+            error_msg = f"發送命令失敗: {str(e)}"
+            logger.error(error_msg)
+            return False, {'type': 'error', 'message': error_msg, 'sent': sent}
+    
+    async def send_command_async(self, command: str, data: Optional[dict] = None, timeout: float = 5) -> Tuple[bool, dict]:
+        """
+        非同步發送命令到 Socket Server（使用獨立的 StreamReader/StreamWriter 連線）
+        
+        多個房間的命令可以用 asyncio.gather 同時發送，總耗時接近最慢的一次往返，
+        而不是所有往返時間的總和。
+        
+        Args:
+            command: 命令類型（如 'ping', 'echo', 'command'）
+            data: 額外的數據（可選）
+            timeout: 連接與接收響應的超時時間（秒）
+        
+        Returns:
+            (成功, 響應字典)
+        """
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.socket_ip, self.socket_port),
+                timeout=timeout
+            )
+            sock = writer.get_extra_info('socket')
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            
+            # 接收並消耗歡迎消息（服務器可能不發送）
+            try:
+                welcome = await asyncio.wait_for(reader.readline(), timeout=2)
+                if welcome:
+                    logger.debug(f"收到歡迎消息: {welcome.decode('utf-8').strip()}")
+            except asyncio.TimeoutError:
+                pass
+            
+            # 如果有 client_id，先登錄
+            if self.client_id:
+                login_message = {'type': 'login', 'device_id': self.client_id}
+                writer.write((json.dumps(login_message) + '\n').encode('utf-8'))
+                await writer.drain()
+                login_line = await asyncio.wait_for(reader.readline(), timeout=timeout)
+                if not login_line:
+                    return False, {'type': 'error', 'message': '未收到登錄響應'}
+                login_response = json.loads(login_line.decode('utf-8'))
+                if not login_response.get('success'):
+                    return False, {'type': 'error', 'message': login_response.get('message', '登錄失敗')}
+            
+            # 發送命令（JSON 格式，以換行符結尾）
+            message = {
+                'type': command,
+                'data': data if data else {}
+            }
+            writer.write((json.dumps(message) + '\n').encode('utf-8'))
+            await writer.drain()
+            logger.debug(f"發送命令: {command}")
+            
+            response_line = await asyncio.wait_for(reader.readline(), timeout=timeout)
+            if not response_line:
+                return False, {'type': 'error', 'message': '未收到響應'}
+            
+            response_str = response_line.decode('utf-8').strip()
+            try:
+                response = json.loads(response_str)
+                logger.debug(f"收到響應: {response}")
+                return True, response
+            except json.JSONDecodeError:
+                return False, {'type': 'error', 'message': f'無效的響應格式: {response_str}'}
+        
+        except asyncio.TimeoutError:
+            return False, {'type': 'error', 'message': f'連接或接收響應超時: {self.socket_ip}:{self.socket_port}'}
+        except ConnectionRefusedError:
+            return False, {'type': 'error', 'message': f'連接被拒絕: {self.socket_ip}:{self.socket_port}'}
         except Exception as e:
             error_msg = f"發送命令失敗: {str(e)}"
             logger.error(error_msg)
             return False, {'type': 'error', 'message': error_msg}
+        finally:
+            if writer is not None:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except Exception:
+                    pass
     
     def __enter__(self):
         """上下文管理器入口"""
@@ -229,6 +346,53 @@ class SocketClient:
         self.disconnect()
 
 
+def send_commands_concurrently(
+    targets: List[Tuple[str, int]],
+    command: str,
+    data: Optional[dict] = None,
+    timeout: float = 5
+) -> List[Tuple[bool, dict]]:
+    """
+    同時向多個 Socket Server 發送同一個命令
+    
+    在單一事件迴圈中以 asyncio.gather 發送，適合在 Streamlit 的同步程式碼中呼叫。
+    
+    Args:
+        targets: [(socket_ip, socket_port), ...]
+        command: 命令類型
+        data: 額外的數據（可選）
+        timeout: 每個連線的超時時間（秒）
+    
+    Returns:
+        與 targets 順序一致的 [(成功, 響應字典), ...]
+    """
+    if not targets:
+        return []
+    
+    async def _gather():
+        return await asyncio.gather(*[
+            SocketClient(ip, port).send_command_async(command, data, timeout=timeout)
+            for ip, port in targets
+        ])
+    
+    return asyncio.run(_gather())
+
+
+def get_socket_server_log_path(room_id: str, socket_port: int) -> Path:
+    """
+    取得 Socket Server 日誌文件路徑
+    
+    Args:
+        room_id: 房間 ID
+        socket_port: Socket Server 端口
+    
+    Returns:
+        日誌文件路徑
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    return project_root / "logs" / "socket_servers" / f"room_{room_id}_{socket_port}.log"
+
+
 def read_socket_server_log(room_id: str, socket_port: int, lines: int = 100) -> List[str]:
     """
     讀取 Socket Server 的日誌文件
@@ -243,9 +407,7 @@ def read_socket_server_log(room_id: str, socket_port: int, lines: int = 100) ->
     """
     try:
         # 日誌文件路徑
-        current_file = Path(__file__).resolve()
-        project_root = current_file.parent.parent
-        log_file = project_root / "logs" / "socket_servers" / f"room_{room_id}_{socket_port}.log"
+        log_file = get_socket_server_log_path(room_id, socket_port)
         
         if not log_file.exists():
             return []
@@ -260,3 +422,82 @@ def read_socket_server_log(room_id: str, socket_port: int, lines: int = 100) ->
         return []
 
 
+class LogTailer:
+    """
+    日誌尾隨讀取器
+    
+    記住上次讀取的文件偏移量，每次只讀取新追加的內容，
+    並在記憶體中保留最後 N 行，避免每次刷新都重新讀取整個日誌文件。
+    """
+    
+    # 首次讀取時最多從文件末尾回溯的位元組數
+    INITIAL_READ_BYTES = 256 * 1024
+    
+    def __init__(self, log_file: Path, lines: int = 200):
+        """
+        初始化日誌尾隨讀取器
+        
+        Args:
+            log_file: 日誌文件路徑
+            lines: 保留的行數
+        """
+        self.log_file = Path(log_file)
+        self.offset: int = 0
+        self.buffer: deque = deque(maxlen=lines)
+        self._partial: bytes = b""
+    
+    def reset(self):
+        """清空緩衝並從頭開始追蹤（文件被截斷或輪替時使用）"""
+        self.offset = 0
+        self.buffer.clear()
+        self._partial = b""
+    
+    def tail(self) -> List[str]:
+        """
+        讀取自上次以來新追加的內容
+        
+        Returns:
+            最後 N 行日誌（保留行尾換行符）
+        """
+        try:
+            size = self.log_file.stat().st_size
+        except OSError:
+            self.reset()
+            return []
+        
+        try:
+            # 文件變小表示被截斷或輪替，重新開始
+            if size < self.offset:
+                self.reset()
+            
+            if size == self.offset:
+                return list(self.buffer)
+            
+            with open(self.log_file, 'rb') as f:
+                skip_first_line = False
+                if self.offset == 0 and size > self.INITIAL_READ_BYTES:
+                    # 首次讀取大文件時只讀取末尾（多讀前一個位元組以判斷行邊界），丟棄第一個不完整的行
+                    self.offset = size - self.INITIAL_READ_BYTES - 1
+                    skip_first_line = True
+                
+                f.seek(self.offset)
+                new = f.read()
+            
+            self.offset += len(new)
+            data = self._partial + new
+            if skip_first_line:
+                data = data.split(b"\n", 1)[1] if b"\n" in data else b""
+            
+            # 最後一行尚未寫完時保留到下次讀取
+            complete, sep, self._partial = data.rpartition(b"\n")
+            if sep:
+                text = (complete + sep).decode('utf-8', errors='replace')
+                self.buffer.extend(text.splitlines(keepends=True))
+            else:
+                self._partial = data
+            
+            return list(self.buffer)
+        
+        except Exception as e:
+            logger.error(f"讀取日誌文件失敗: {e}")
+            return list(self.buffer)
@@ -6,7 +6,7 @@ import subprocess
 import signal
 import os
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Set, Tuple
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -273,6 +273,15 @@ class SocketServerManager:
         process = self.servers[room_id]
         return process.poll() is None
     
+    def get_running_server_ids(self) -> Set[str]:
+        """
+        一次取得所有正在運行的 Socket Server 房間 ID
+        
+        Returns:
+            運行中的房間 ID 集合
+        """
+        return {room_id for room_id, process in self.servers.items() if process.poll() is None}
+    
     def get_server_info(self, room_id: str) -> Optional[dict]:
         """
         獲取 Socket Server 資訊
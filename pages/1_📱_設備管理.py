@@ -14,6 +14,7 @@ from core.ping_service import PingService
 from config.constants import DeviceStatus, STATUS_ICONS, CONNECTION_ICONS, ConnectionType
 from config.settings import UI_REFRESH_INTERVAL, ADB_DEFAULT_PORT, get_user_config
 from utils.logger import get_logger
+from utils.style import minify_css
 
 logger = get_logger(__name__)
 
@@ -24,8 +25,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# 自定義 CSS 樣式
-st.markdown("""
+# 自定義 CSS 樣式（模組載入時壓縮一次）
+PAGE_CSS = minify_css("""
     <style>
     /* 隱藏標題旁的錨點鏈接圖標 */
     a.st-emotion-cache-yinll1,
@@ -104,8 +105,19 @@ st.markdown("""
     [data-testid="stTooltipHoverTarget"] {
         justify-content: center !important;
     }
+    
+    /* 隱藏對話框的關閉按鈕（所有對話框共用，避免每個對話框各自注入；只限對話框內，不影響頁面其他按鈕） */
+    div[data-testid="stDialog"] button[kind="header"],
+    div[data-testid="stDialog"] button[aria-label="Close"],
+    div[data-testid="stDialog"] button.st-emotion-cache-ue6h4q,
+    div[data-testid="stDialog"] button.st-emotion-cache-7oyrr6,
+    div[role="dialog"] button[kind="header"],
+    div[role="dialog"] button[aria-label="Close"] {
+        display: none !important;
+    }
     </style>
-""", unsafe_allow_html=True)
+""")
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
 
 # 使用 JavaScript 動態讓排序按鈕容器水平排列
 st.markdown("""
@@ -249,35 +261,6 @@ def show_add_device_dialog():
 @st.dialog("🗑️ 確認移除設備", width="small")
 def confirm_remove_device(device: Device):
     """確認移除設備對話框（使用 st.dialog 裝飾器）"""
-    # 隱藏對話框右上角的關閉按鈕
-    st.markdown("""
-        <style>
-        /* 隱藏對話框的關閉按鈕 - 使用多種選擇器確保覆蓋 */
-        button[kind="header"] {
-            display: none !important;
-        }
-        
-        button[aria-label="Close"] {
-            display: none !important;
-        }
-        
-        div[data-testid="stDialog"] button[kind="header"] {
-            display: none !important;
-        }
-        
-        /* 針對可能的內部類名 */
-        button.st-emotion-cache-ue6h4q,
-        button.st-emotion-cache-7oyrr6 {
-            display: none !important;
-        }
-        
-        /* 通過屬性選擇器 */
-        button[data-baseweb="button"][kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     st.warning(f"確定要移除設備 **{device.display_name}** 嗎？")
     if device.ip:
         st.caption(f"連接：{device.ip}:{device.port}")
@@ -306,35 +289,6 @@ def confirm_remove_device(device: Device):
 @st.dialog("⚙️ 編輯設備", width="large")
 def edit_device_dialog(device: Device):
     """編輯設備對話框"""
-    # 隱藏對話框右上角的關閉按鈕
-    st.markdown("""
-        <style>
-        /* 隱藏對話框的關閉按鈕 - 使用多種選擇器確保覆蓋 */
-        button[kind="header"] {
-            display: none !important;
-        }
-        
-        button[aria-label="Close"] {
-            display: none !important;
-        }
-        
-        div[data-testid="stDialog"] button[kind="header"] {
-            display: none !important;
-        }
-        
-        /* 針對可能的內部類名 */
-        button.st-emotion-cache-ue6h4q,
-        button.st-emotion-cache-7oyrr6 {
-            display: none !important;
-        }
-        
-        /* 通過屬性選擇器 */
-        button[data-baseweb="button"][kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     if device.ip:
         st.markdown(f"**連接**: `{device.ip}:{device.port}`")
     st.markdown("---")
@@ -413,15 +367,6 @@ def edit_device_dialog(device: Device):
 @st.dialog("⚡ 執行動作", width="large")
 def execute_action_dialog(device: Device):
     """在設備上執行動作對話框"""
-    # 隱藏對話框右上角的關閉按鈕
-    st.markdown("""
-        <style>
-        button[kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     st.subheader(f"📱 目標設備：{device.display_name}")
     
     if not device.is_online:
@@ -2,15 +2,22 @@
 房間管理頁面
 """
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
-from typing import Optional
+import streamlit.components.v1 as components
+from typing import Any, List, Optional, Tuple
+import os
 import time
 import json
+from bisect import bisect_right
+from itertools import accumulate
+from collections import Counter, namedtuple
 from datetime import datetime
-from core.room import Room
+from core.room import Room, RoomParameterType
 from core.room_registry import RoomRegistry
+from core.socket_client import SocketClient, LogTailer, get_socket_server_log_path
 from config.constants import DeviceStatus, STATUS_ICONS
+from config.settings import SCREENSHOT_CONFIG
 from utils.logger import get_logger
+from utils.style import minify_css
 
 logger = get_logger(__name__)
 
@@ -22,7 +29,9 @@ st.set_page_config(
 )
 
 # 自定義 CSS 樣式
-st.markdown("""
+# 注意：Streamlit 會移除本次執行中沒有重新輸出的元素，因此 CSS 必須每次完整執行時都輸出，
+# 不能用 session_state 只注入一次；狀態的定時刷新由 fragment 處理，不會重送這段 CSS。
+PAGE_CSS = minify_css("""
     <style>
     /* 隱藏標題旁的錨點鏈接圖標 */
     a.st-emotion-cache-yinll1,
@@ -64,20 +73,31 @@ st.markdown("""
         word-wrap: break-word !important;
         overflow-wrap: break-word !important;
     }
+    
+    /* 隱藏對話框的關閉按鈕（所有對話框共用，避免每個對話框各自注入；只限對話框內，不影響頁面其他按鈕） */
+    div[data-testid="stDialog"] button[kind="header"],
+    div[data-testid="stDialog"] button[aria-label="Close"],
+    div[data-testid="stDialog"] button.st-emotion-cache-ue6h4q,
+    div[data-testid="stDialog"] button.st-emotion-cache-7oyrr6,
+    div[role="dialog"] button[kind="header"],
+    div[role="dialog"] button[aria-label="Close"] {
+        display: none !important;
+    }
     </style>
-""", unsafe_allow_html=True)
+""")
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
 
-# 自動刷新（每 5 秒）- 但在有對話框時暫停
-dialog_keys = [key for key in st.session_state.keys() if key.startswith(('add_room', 'edit_room_', 'delete_room_', 'show_manage_devices_', 'show_execute_action_room_', 'show_room_view_'))]
-dialog_states = {key: st.session_state.get(key, False) for key in dialog_keys}
-has_dialog_open = any(dialog_states.values())
+# 自動刷新 - 只刷新房間卡片的狀態區塊（fragment），在有對話框時暫停
+has_dialog_open = st.session_state.get('active_dialog') is not None
 
-# 只在沒有對話框時自動刷新
-if not has_dialog_open:
-    count = st_autorefresh(interval=5000, key="room_refresh")
+# 房間狀態刷新間隔（秒）：狀態持續不變時逐級延長，有變化或使用者操作時回到最短間隔
+STATUS_REFRESH_LEVELS = (2, 5, 10, 30)
+STATUS_REFRESH_BACKOFF_TICKS = 3
+# 每一級維持 BACKOFF_TICKS 個間隔後升級：狀態未變化的累計秒數門檻
+_STATUS_REFRESH_THRESHOLDS = tuple(accumulate(level * STATUS_REFRESH_BACKOFF_TICKS for level in STATUS_REFRESH_LEVELS[:-1]))
 
 # 初始化系統
-from utils.init import init_all, ensure_room_registry, ensure_socket_server_manager
+from utils.init import init_all, ensure_room_registry, ensure_socket_server_manager, invalidate_started_rooms
 
 if not init_all():
     st.stop()
@@ -89,42 +109,284 @@ ensure_room_registry()
 ensure_socket_server_manager()
 
 # Session state 初始化
-if 'show_add_room_dialog' not in st.session_state:
-    st.session_state.show_add_room_dialog = False
+# 同一時間只會有一個對話框，以 (類型, 對象 ID) 指標記錄，避免逐一檢查每個房間/設備的旗標
+if 'active_dialog' not in st.session_state:
+    st.session_state.active_dialog = None
+
+# 應用端旗標（非 widget key）以 tuple 為鍵存放在單一 dict，避免每台設備都拼接字串鍵
+if '_flags' not in st.session_state:
+    st.session_state._flags = {}
+
+
+def open_dialog(kind: str, entity_id: Optional[str] = None):
+    """打開對話框（取代目前打開的對話框）"""
+    st.session_state.active_dialog = (kind, entity_id)
+
+
+def close_dialog():
+    """關閉目前的對話框"""
+    st.session_state.active_dialog = None
+
+
+def queue_toast(message: str, icon: str):
+    """排入提示訊息，在 st.rerun() 之後的下一次執行顯示（取代 sleep 等待使用者看到訊息）"""
+    st.session_state.setdefault('_pending_toasts', []).append((message, icon))
+
+
+def _partition_by_status(devices) -> dict:
+    """單次遍歷將設備按狀態分組（在線 / 離線 / 未連接）"""
+    buckets = {status: [] for status in (DeviceStatus.ONLINE, DeviceStatus.OFFLINE, DeviceStatus.NOT_CONNECTED)}
+    for device in devices:
+        bucket = buckets.get(device.status)
+        if bucket is not None:
+            bucket.append(device)
+    return buckets
+
+
+def _parse_command_json(room_id: str, command_data: str) -> Tuple[bool, Any]:
+    """
+    解析命令數據 JSON（結果保存在 session_state，同一段文本重複發送時不再重新解析）
+    
+    Returns:
+        (是否有效, 解析後的數據)
+    """
+    cache_key = f'_command_json_{room_id}'
+    cached = st.session_state.get(cache_key)
+    if cached and cached[0] == command_data:
+        return cached[1], cached[2]
+    
+    try:
+        result = (True, json.loads(command_data))
+    except json.JSONDecodeError:
+        result = (False, None)
+    st.session_state[cache_key] = (command_data, *result)
+    return result
+
+
+def send_room_command(room: Room, command: str, data=None) -> Tuple[bool, dict]:
+    """
+    透過房間的持久 Socket 連線發送命令
+    
+    每個房間的 SocketClient 保存在 st.session_state['_socket_clients']。
+    重用的連線在命令送出前就失敗（例如服務器重啟後連線已關閉）時以新連線重試一次；
+    命令已送出後的失敗（例如等待響應超時）不重試，避免同一命令被送達兩次。
+    
+    Returns:
+        (成功, 響應字典)
+    """
+    clients = st.session_state.setdefault('_socket_clients', {})
+    client = clients.get(room.room_id)
+    
+    # 房間的 Socket Server 地址變更時丟棄舊連線
+    if client and (client.socket_ip, client.socket_port) != (room.socket_ip, room.socket_port):
+        client.disconnect()
+        client = None
+    
+    if client is None:
+        client = SocketClient(room.socket_ip, room.socket_port)
+        clients[room.room_id] = client
+    
+    reused = client.connected
+    success, response = client.send_command(command, data)
+    if not success and reused and not response.get('sent', True):
+        # 重用的連線已失效且命令未送出，關閉後以新連線重試一次
+        client.disconnect()
+        success, response = client.send_command(command, data)
+    if not success:
+        client.disconnect()
+    
+    return success, response
+
+
+def _get_log_tailer(room_id: str, socket_port: int, lines: int = 200) -> LogTailer:
+    """取得房間的日誌尾隨讀取器（保存在 session_state，每次刷新只讀取新追加的內容）"""
+    tailer_key = f'log_tailer_{room_id}'
+    log_file = get_socket_server_log_path(room_id, socket_port)
+    tailer = st.session_state.get(tailer_key)
+    if tailer is None or tailer.log_file != log_file:
+        tailer = LogTailer(log_file, lines=lines)
+        st.session_state[tailer_key] = tailer
+    return tailer
+
+
+@st.cache_data(ttl=2.0, show_spinner=False)
+def _adb_devices_cached():
+    """取得 ADB 設備列表快照（2 秒內的 rerun 共用同一份結果，避免重複執行 adb devices）"""
+    return st.session_state.adb_manager.get_devices()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_all_rooms(registry_id: int, version: int):
+    """取得所有房間（以註冊管理器的資料版本號作為快取鍵，寫入後立即失效）"""
+    return st.session_state.room_registry.get_all_rooms()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_room_statistics(registry_id: int, version: int):
+    """取得房間統計信息（以註冊管理器的資料版本號作為快取鍵，寫入後立即失效）"""
+    return st.session_state.room_registry.get_statistics()
+
+
+@st.cache_data(ttl=2, show_spinner=False)
+def _cached_all_room_devices(registry_id: int, version: int):
+    """
+    取得所有房間的設備快照 {room_id: [Device]}
+    
+    所有房間卡片共用一次批量查詢；快取時間與最短刷新間隔一致，2 秒內共用，
+    房間設備變更會更新版本號，使快取立即失效
+    """
+    room_registry = st.session_state.room_registry
+    return room_registry.get_all_room_devices(
+        st.session_state.device_registry,
+        _cached_all_rooms(registry_id, version)
+    )
+
+
+@st.cache_data(ttl=SCREENSHOT_CONFIG.get('update_interval', 5), show_spinner=False)
+def _cached_device_status_batch(conn_strs: Tuple[str, ...]) -> dict:
+    """
+    並發取得多台設備的詳細狀態
+    
+    快取時間與預覽更新頻率一致：期間內的 rerun 共用同一份結果，避免每次刷新都執行 ADB shell
+    """
+    return st.session_state.adb_manager.get_device_status_batch(list(conn_strs))
+
+
+# 重新連接對話框的設備狀態記錄
+ReconnectStatus = namedtuple('ReconnectStatus', 'device status reason')
+
+# (設備狀態, ADB state) -> (顯示狀態, 原因, 是否需要重新連接)
+_RECONNECT_BY_ADB_STATE = {
+    (DeviceStatus.ONLINE, "device"): ('已連接', '設備在線（ADB state: device）', False),
+    (DeviceStatus.ONLINE, "offline"): ('離線', '設備在 ADB 列表中但狀態為 offline', False),
+}
+
+# 設備狀態 -> (顯示狀態, 原因, 是否需要重新連接)；需要重新連接但沒有 IP 的設備視為無法連接
+_RECONNECT_BY_STATUS = {
+    DeviceStatus.NOT_CONNECTED: ('需要重新連接', '設備未連接（不在 ADB 列表中）', True),
+    DeviceStatus.ONLINE: ('需要重新連接', '設備標記為在線但不在 ADB 列表中', True),
+    DeviceStatus.OFFLINE: ('跳過', '設備狀態為離線（ADB state: offline），不需要重新連接', False),
+}
+
+
+# 重新連接對話框：連接狀態圖示（未列出的狀態顯示 ❌）
+_RECONNECT_STATUS_ICONS = {
+    '需要重新連接': '⚠️',
+    '已連接': '✅',
+    '跳過': '⏭️',
+}
+
+# 設備狀態顯示文字
+_DEVICE_STATUS_TEXT = {
+    DeviceStatus.ONLINE: "🟢 在線",
+    DeviceStatus.OFFLINE: "🟠 離線",
+    DeviceStatus.NOT_CONNECTED: "⚫ 未連接",
+}
+
+# 房間參數類型選項與索引（下拉選單以字典 O(1) 取得目前值的位置）
+_PARAM_TYPE_OPTIONS = tuple(t.value for t in RoomParameterType)
+_PARAM_TYPE_INDEX = {v: i for i, v in enumerate(_PARAM_TYPE_OPTIONS)}
+
+
+# 房間參數值輸入框（依參數類型分派，未列出的類型使用文字輸入）
+def _param_input_bool(label: str, current_value, key: str):
+    return st.checkbox(label, value=bool(current_value) if current_value is not None else False, key=key)
+
+
+def _param_input_int(label: str, current_value, key: str):
+    return st.number_input(label, value=int(current_value) if current_value is not None else 0, key=key, step=1)
+
+
+def _param_input_float(label: str, current_value, key: str):
+    return st.number_input(label, value=float(current_value) if current_value is not None else 0.0, key=key, format="%f")
+
+
+def _param_input_text(label: str, current_value, key: str):
+    return st.text_input(label, value=str(current_value) if current_value is not None else "", key=key)
+
+
+_PARAM_INPUT_RENDERERS = {
+    RoomParameterType.BOOLEAN: _param_input_bool,
+    RoomParameterType.INTEGER: _param_input_int,
+    RoomParameterType.LONG: _param_input_int,
+    RoomParameterType.FLOAT: _param_input_float,
+}
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _room_params_payload(revision: str, _parameters):
+    """
+    序列化房間參數（以 Room.parameters_revision 為快取鍵）
+    
+    Returns:
+        (參數傳輸列表, 預覽用 JSON 字串)
+    """
+    params_list = [p.to_transport() for p in _parameters] if _parameters else []
+    return params_list, json.dumps(params_list, ensure_ascii=False, indent=2)
+
+
+def _get_socket_log_mtime(room_id: str, socket_port: int) -> Optional[float]:
+    """取得 Socket Server 日誌文件的修改時間（文件不存在時返回 None）"""
+    try:
+        return os.path.getmtime(get_socket_server_log_path(room_id, socket_port))
+    except OSError:
+        return None
+
+
+@st.fragment(run_every=2)
+def render_socket_log_panel(room_id: str, socket_port: int):
+    """
+    Socket Server 日誌監看面板（fragment：每 2 秒只重跑本面板，不重跑整個頁面）
+    
+    只有日誌 mtime 前進時才重新讀取日誌、寫入文本框內容並送出滾動腳本
+    """
+    log_key = f"socket_log_{room_id}"
+    mtime_key = f"socket_log_mtime_{room_id}"
+    log_mtime = _get_socket_log_mtime(room_id, socket_port)
+    
+    # 使用固定 key，內容只在 mtime 變更時寫入 session_state，避免每次執行重送整段日誌
+    changed = log_key not in st.session_state or st.session_state.get(mtime_key) != log_mtime
+    if changed:
+        # 尾隨讀取，只讀取新追加的內容
+        st.session_state[log_key] = ''.join(_get_log_tailer(room_id, socket_port, lines=200).tail())
+        st.session_state[mtime_key] = log_mtime
+    
+    if not st.session_state[log_key]:
+        st.info("📝 日誌文件不存在或為空")
+        st.button("🔄 刷新日誌", key=f"refresh_log_{room_id}")
+        return
+    
+    # 顯示日誌（只讀文本框）
+    st.text_area(
+        "Socket Server 日誌",
+        height=300,
+        disabled=True,
+        key=log_key
+    )
+    
+    # 自動滾動到底部：只在內容更新時送出腳本
+    if changed:
+        js = f"""
+        <script>
+            // mtime: {log_mtime}
+            // 以屬性選擇器直接定位日誌文本框，在下一個繪製幀滾動一次
+            window.requestAnimationFrame(function() {{
+                var textArea = window.parent.document.querySelector('textarea[aria-label="Socket Server 日誌"]');
+                if (textArea) {{
+                    textArea.scrollTop = textArea.scrollHeight;
+                }}
+            }});
+        </script>
+        """
+        components.html(js, height=0)
+    
+    # 刷新按鈕（點擊只重跑本面板）
+    st.button("🔄 刷新日誌", key=f"refresh_log_{room_id}")
 
 
 @st.dialog("➕ 新增房間", width="large")
 def add_room_dialog():
     """新增房間對話框"""
-    # 隱藏對話框右上角的關閉按鈕
-    st.markdown("""
-        <style>
-        /* 隱藏對話框的關閉按鈕 - 使用多種選擇器確保覆蓋 */
-        button[kind="header"] {
-            display: none !important;
-        }
-        
-        button[aria-label="Close"] {
-            display: none !important;
-        }
-        
-        div[data-testid="stDialog"] button[kind="header"] {
-            display: none !important;
-        }
-        
-        /* 針對可能的內部類名 */
-        button.st-emotion-cache-ue6h4q,
-        button.st-emotion-cache-7oyrr6 {
-            display: none !important;
-        }
-        
-        /* 通過屬性選擇器 */
-        button[data-baseweb="button"][kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     st.subheader("📝 基本資訊")
     
     # 房間名稱
@@ -204,7 +466,7 @@ def add_room_dialog():
             )
             
             if room:
-                st.success(f"✅ 房間已創建：{room.display_name}")
+                queue_toast(f"房間已創建：{room.display_name}", "✅")
                 logger.info(f"✅ 創建房間成功: {room.display_name}")
                 
                 # 如果配置了 Socket Server，自動啟動
@@ -218,19 +480,18 @@ def add_room_dialog():
                             room.socket_port
                         )
                         if success:
-                            st.info(f"📡 Socket Server 已啟動: {room.socket_ip}:{room.socket_port}")
+                            queue_toast(f"Socket Server 已啟動: {room.socket_ip}:{room.socket_port}", "📡")
                         else:
-                            st.warning(f"⚠️ Socket Server 啟動失敗: {msg}")
+                            queue_toast(f"Socket Server 啟動失敗: {msg}", "⚠️")
                 
-                st.session_state.show_add_room_dialog = False
-                time.sleep(0.5)
+                close_dialog()
                 st.rerun()
             else:
                 st.error("❌ 創建房間失敗（可能名稱已存在）")
     
     with col2:
         if st.button("❌ 取消", use_container_width=True, key="add_room_cancel"):
-            st.session_state.show_add_room_dialog = False
+            close_dialog()
             st.rerun()
 
 
@@ -247,15 +508,6 @@ def edit_room_dialog(room: Room):
     
     # 使用緩衝區對象進行所有操作
     room_buffer = st.session_state[buffer_key]
-    
-    # 隱藏對話框右上角的關閉按鈕
-    st.markdown("""
-        <style>
-        button[kind="header"] { display: none !important; }
-        button[aria-label="Close"] { display: none !important; }
-        div[data-testid="stDialog"] button[kind="header"] { display: none !important; }
-        </style>
-    """, unsafe_allow_html=True)
 
     # ---------------------------
     # 參數編輯子視圖
@@ -293,16 +545,10 @@ def edit_room_dialog(room: Room):
         p_name = st.text_input("參數名稱", value=current_param.name, key=f"p_name_{room.room_id}")
         
         # 類型選擇
-        type_options = [t.value for t in RoomParameterType]
-        try:
-            type_index = type_options.index(current_param.value_type)
-        except ValueError:
-            type_index = 0
-            
         p_type_str = st.selectbox(
             "參數類型", 
-            type_options, 
-            index=type_index,
+            _PARAM_TYPE_OPTIONS, 
+            index=_PARAM_TYPE_INDEX.get(current_param.value_type, 0),
             key=f"p_type_{room.room_id}"
         )
         p_type = RoomParameterType(p_type_str)
@@ -312,18 +558,11 @@ def edit_room_dialog(room: Room):
         st.markdown("---")
         st.caption("參數值設定")
         
-        # 輔助函數：根據類型渲染輸入框
+        # 根據類型渲染輸入框（輸入元件在進入設備迴圈前解析一次）
+        input_renderer = _PARAM_INPUT_RENDERERS.get(p_type, _param_input_text)
+        
         def render_input(label, current_value, key_suffix):
-            k = f"val_{key_suffix}_{room.room_id}"
-            
-            if p_type == RoomParameterType.BOOLEAN:
-                return st.checkbox(label, value=bool(current_value) if current_value is not None else False, key=k)
-            elif p_type in [RoomParameterType.INTEGER, RoomParameterType.LONG]:
-                return st.number_input(label, value=int(current_value) if current_value is not None else 0, key=k, step=1)
-            elif p_type == RoomParameterType.FLOAT:
-                return st.number_input(label, value=float(current_value) if current_value is not None else 0.0, key=k, format="%f")
-            else:
-                return st.text_input(label, value=str(current_value) if current_value is not None else "", key=k)
+            return input_renderer(label, current_value, f"val_{key_suffix}_{room.room_id}")
 
         new_global_value = current_param.global_value
         import copy
@@ -391,20 +630,18 @@ def edit_room_dialog(room: Room):
                 # 我們應該檢查 room.socket_ip (已保存的) 是否有運行的服務器
                 # 如果用戶改了 IP 但沒保存重啟，這裡發送會失敗，這是預期的。
                 if room.socket_ip and room.socket_port:
-                    from core.socket_client import SocketClient
-
+                    # 構建 payload（在建立連線之前準備好）
+                    command_type = "send_params" # 重用協議，或者單獨定義 "update_param"?
+                    # 用戶請求是 "send parameters"，可以是一個 list 包含單個 param
+                    data = [live_param.to_transport()]
+                    
                     try:
-                        with SocketClient(room.socket_ip, room.socket_port) as client:
-                            # 構建 payload
-                            command_type = "send_params" # 重用協議，或者單獨定義 "update_param"?
-                            # 用戶請求是 "send parameters"，可以是一個 list 包含單個 param
-                            data = [live_param.to_transport()]
-                            
-                            success, response = client.send_command(command_type, data)
-                            if success:
-                                st.toast(f"✅ 參數 {live_param.name} 發送成功!", icon="🚀")
-                            else:
-                                st.error(f"❌ 發送失敗: {response.get('message', '未知錯誤')}")
+                        # 使用房間的持久連線，連續調整參數時不必每次重新建立 TCP 連線
+                        success, response = send_room_command(room, command_type, data)
+                        if success:
+                            st.toast(f"✅ 參數 {live_param.name} 發送成功!", icon="🚀")
+                        else:
+                            st.error(f"❌ 發送失敗: {response.get('message', '未知錯誤')}")
                     except Exception as e:
                         st.error(f"❌ 連接失敗: {str(e)}")
                 else:
@@ -603,7 +840,7 @@ def edit_room_dialog(room: Room):
                 room_buffer.socket_port = socket_port if socket_ip else None
                 
                 if st.session_state.room_registry.update_room(room_buffer):
-                    st.success(f"✅ 房間已更新")
+                    queue_toast("房間已更新", "✅")
                     # Socket Server 重啟邏輯 (與之前相同)
                     # ... 略 ...
                     if (old_socket_ip != room_buffer.socket_ip or old_socket_port != room_buffer.socket_port):
@@ -612,19 +849,20 @@ def edit_room_dialog(room: Room):
                             if old_socket_ip: sm.stop_server(room.room_id)
                             if room_buffer.socket_ip: 
                                 sm.start_server(room.room_id, room_buffer.name, room_buffer.socket_ip, room_buffer.socket_port)
+                         # 配置已變更：讓啟動記錄重新同步
+                         invalidate_started_rooms(room.room_id)
 
-                    st.session_state[f'edit_room_{room.room_id}'] = False
+                    close_dialog()
                     # 清除 buffer
                     if buffer_key in st.session_state:
                         del st.session_state[buffer_key]
-                    time.sleep(0.5)
                     st.rerun()
                 else:
                     st.error("❌ 更新失敗")
 
     with col2:
         if st.button("❌ 取消", use_container_width=True, key=f"edit_room_cancel_{room.room_id}"):
-            st.session_state[f'edit_room_{room.room_id}'] = False
+            close_dialog()
             # 清除 buffer
             if buffer_key in st.session_state:
                 del st.session_state[buffer_key]
@@ -634,35 +872,6 @@ def edit_room_dialog(room: Room):
 @st.dialog("🗑️ 確認刪除房間", width="small")
 def delete_room_dialog(room: Room):
     """刪除房間確認對話框"""
-    # 隱藏對話框右上角的關閉按鈕
-    st.markdown("""
-        <style>
-        /* 隱藏對話框的關閉按鈕 - 使用多種選擇器確保覆蓋 */
-        button[kind="header"] {
-            display: none !important;
-        }
-        
-        button[aria-label="Close"] {
-            display: none !important;
-        }
-        
-        div[data-testid="stDialog"] button[kind="header"] {
-            display: none !important;
-        }
-        
-        /* 針對可能的內部類名 */
-        button.st-emotion-cache-ue6h4q,
-        button.st-emotion-cache-7oyrr6 {
-            display: none !important;
-        }
-        
-        /* 通過屬性選擇器 */
-        button[data-baseweb="button"][kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     st.warning(f"確定要刪除房間 **{room.display_name}** 嗎？")
     
     if room.device_count > 0:
@@ -679,55 +888,26 @@ def delete_room_dialog(room: Room):
                     socket_manager = st.session_state.socket_server_manager
                     socket_manager.stop_server(room.room_id)
                     logger.info(f"🛑 已停止 Socket Server: {room.name}")
+                invalidate_started_rooms(room.room_id)
             
             # 刪除房間
             if st.session_state.room_registry.delete_room(room.room_id):
-                st.success("✅ 房間已刪除")
+                queue_toast("房間已刪除", "✅")
                 logger.info(f"🗑️ 刪除房間: {room.display_name}")
-                st.session_state[f'delete_room_{room.room_id}'] = False
-                time.sleep(0.5)
+                close_dialog()
                 st.rerun()
             else:
                 st.error("❌ 刪除失敗")
     
     with col2:
         if st.button("❌ 取消", use_container_width=True):
-            st.session_state[f'delete_room_{room.room_id}'] = False
+            close_dialog()
             st.rerun()
 
 
 @st.dialog("➕ 管理設備", width="large")
 def manage_devices_dialog(room: Room):
     """管理房間設備對話框"""
-    # 隱藏對話框右上角的關閉按鈕
-    st.markdown("""
-        <style>
-        /* 隱藏對話框的關閉按鈕 - 使用多種選擇器確保覆蓋 */
-        button[kind="header"] {
-            display: none !important;
-        }
-        
-        button[aria-label="Close"] {
-            display: none !important;
-        }
-        
-        div[data-testid="stDialog"] button[kind="header"] {
-            display: none !important;
-        }
-        
-        /* 針對可能的內部類名 */
-        button.st-emotion-cache-ue6h4q,
-        button.st-emotion-cache-7oyrr6 {
-            display: none !important;
-        }
-        
-        /* 通過屬性選擇器 */
-        button[data-baseweb="button"][kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     st.subheader(f"📱 管理設備 - {room.display_name}")
     
     # 顯示房間容量
@@ -745,7 +925,7 @@ def manage_devices_dialog(room: Room):
     if not all_devices:
         st.warning("⚠️ 沒有可用的設備")
         if st.button("關閉"):
-            st.session_state[f'show_manage_devices_{room.room_id}'] = False
+            close_dialog()
             st.rerun()
         return
     
@@ -830,105 +1010,26 @@ def manage_devices_dialog(room: Room):
                             transfer_count += 1
             
             if success_count > 0:
-                msg_parts = [f"✅ 成功更新 {success_count} 台設備"]
+                msg_parts = [f"成功更新 {success_count} 台設備"]
                 if transfer_count > 0:
                     msg_parts.append(f"（其中 {transfer_count} 台從其他房間轉移）")
-                st.success(" ".join(msg_parts))
+                queue_toast(" ".join(msg_parts), "✅")
                 logger.info(f"✅ 更新房間設備: {room.display_name}")
-                time.sleep(1)
-                st.session_state[f'show_manage_devices_{room.room_id}'] = False
+                close_dialog()
                 st.rerun()
             else:
                 st.info("💡 沒有變更")
     
     with col2:
         if st.button("❌ 取消", use_container_width=True):
-            st.session_state[f'show_manage_devices_{room.room_id}'] = False
+            close_dialog()
             st.rerun()
 
 
-@st.dialog("⚡ 執行動作", width="large")
-def execute_action_on_room_dialog(room: Room):
-    """在房間所有設備上執行動作對話框"""
-    # 隱藏對話框右上角的關閉按鈕
-    st.markdown("""
-        <style>
-        /* 隱藏對話框的關閉按鈕 - 使用多種選擇器確保覆蓋 */
-        button[kind="header"] {
-            display: none !important;
-        }
-        
-        button[aria-label="Close"] {
-            display: none !important;
-        }
-        
-        div[data-testid="stDialog"] button[kind="header"] {
-            display: none !important;
-        }
-        
-        /* 針對可能的內部類名 */
-        button.st-emotion-cache-ue6h4q,
-        button.st-emotion-cache-7oyrr6 {
-            display: none !important;
-        }
-        
-        /* 通過屬性選擇器 */
-        button[data-baseweb="button"][kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
-    st.subheader(f"⚡ 批量執行動作 - {room.display_name}")
-    
-    # 獲取房間內設備
-    room_devices = st.session_state.room_registry.get_room_devices(
-        room.room_id,
-        st.session_state.device_registry
-    )
-    
-    # 按設備管理頁面的排序方式排序
-    room_devices.sort(key=lambda d: d.sort_order)
-    
-    if not room_devices:
-        st.warning("⚠️ 房間內沒有設備")
-        if st.button("關閉"):
-            st.session_state[f'show_execute_action_room_{room.room_id}'] = False
-            st.rerun()
-        return
-    
-    # 顯示設備信息
-    online_devices = [d for d in room_devices if d.status == DeviceStatus.ONLINE]
-    offline_devices = [d for d in room_devices if d.status == DeviceStatus.OFFLINE]
-    not_connected_devices = [d for d in room_devices if d.status == DeviceStatus.NOT_CONNECTED]
-    
-    st.info(f"📱 房間內設備：共 {len(room_devices)} 台（🟢 在線 {len(online_devices)} 台，🟠 離線 {len(offline_devices)} 台，⚫ 未連接 {len(not_connected_devices)} 台）")
-    
-    if not online_devices:
-        st.warning("⚠️ 沒有在線設備，無法執行動作")
-        if st.button("關閉"):
-            st.session_state[f'show_execute_action_room_{room.room_id}'] = False
-            st.rerun()
-        return
-    
-    st.caption("💡 動作將在所有在線設備上執行")
-    
-    st.markdown("---")
-    
-    # 獲取所有動作
-    all_actions = st.session_state.action_registry.get_all_actions()
-    
-    if not all_actions:
-        st.info("📝 還沒有任何動作，請先前往動作管理頁面創建動作")
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("➕ 前往動作管理", use_container_width=True, type="primary"):
-                st.switch_page("pages/3_⚡_動作管理.py")
-        with col2:
-            if st.button("❌ 關閉", use_container_width=True):
-                st.session_state[f'show_execute_action_room_{room.room_id}'] = False
-                st.rerun()
-        return
+@st.fragment
+def _render_room_action_runner(room: Room, online_devices: List, all_actions: List):
+    """房間批量執行：動作選擇、詳情與執行按鈕（獨立重跑的 fragment）"""
+    now = datetime.now()
     
     # 動作選擇
     st.markdown("**選擇要執行的動作**")
@@ -1011,22 +1112,17 @@ def execute_action_on_room_dialog(room: Room):
                     }
                 room_info['device_params_map'] = device_params_map
                 
-                # 使用並發方法執行
-                batch_results = st.session_state.adb_manager.execute_action_batch(
-                    device_list,
-                    selected_action,
-                    progress_callback=update_progress,
-                    room_info=room_info
-                )
-                
-                # 處理結果
+                # 處理結果（每台設備完成時即時回報，而非等待全部完成）
                 success_count = 0
                 fail_count = 0
                 results = []
+                device_by_conn = {d.connection_string: d for d in online_devices}
+                results_placeholder = st.empty()
+                last_render = 0.0
                 
-                for device_str, success, message in batch_results:
-                    # 找到對應的設備對象
-                    device = next((d for d in online_devices if d.connection_string == device_str), None)
+                def on_result(device_str, success, message):
+                    nonlocal success_count, fail_count, last_render
+                    device = device_by_conn.get(device_str)
                     device_name = device.display_name if device else device_str
                     
                     if success:
@@ -1035,19 +1131,36 @@ def execute_action_on_room_dialog(room: Room):
                     else:
                         fail_count += 1
                         results.append(f"❌ {device_name}: {message}")
+                    
+                    # 節流重繪：每 0.3 秒或最後一台設備完成時更新一次
+                    now = time.monotonic()
+                    if len(results) == len(device_list) or now - last_render >= 0.3:
+                        results_placeholder.text("\n".join(results[-10:]))
+                        last_render = now
+                
+                # 使用並發方法執行（結果回調在呼叫端執行緒中依序觸發）
+                st.session_state.adb_manager.execute_action_batch(
+                    device_list,
+                    selected_action,
+                    progress_callback=update_progress,
+                    room_info=room_info,
+                    result_callback=on_result
+                )
                 
                 # 清除進度顯示
+                results_placeholder.empty()
                 progress_placeholder.empty()
                 progress_bar.empty()
                 progress_text.empty()
                 
-                # 更新動作統計
-                selected_action.execution_count += len(online_devices)
-                selected_action.success_count += success_count
-                selected_action.failure_count += fail_count
-                from datetime import datetime
-                selected_action.last_executed_at = datetime.now()
-                selected_action.last_execution_status = f"批量執行：成功 {success_count}/{len(online_devices)}"
+                # 更新動作統計（一次寫入所有欄位，並只持久化一次）
+                selected_action.record_batch_execution(
+                    len(online_devices),
+                    success_count,
+                    fail_count,
+                    f"批量執行：成功 {success_count}/{len(online_devices)}",
+                    now
+                )
                 st.session_state.action_registry.update_action(selected_action)
                 
                 # 顯示結果
@@ -1064,47 +1177,74 @@ def execute_action_on_room_dialog(room: Room):
                 logger.info(f"⚡ 批量執行動作: {selected_action.display_name} -> {room.display_name} (成功: {success_count}, 失敗: {fail_count})")
                 
                 time.sleep(2)
-                st.session_state[f'show_execute_action_room_{room.room_id}'] = False
+                close_dialog()
                 st.rerun()
     
     with col2:
         if st.button("❌ 取消", use_container_width=True):
-            st.session_state[f'show_execute_action_room_{room.room_id}'] = False
+            close_dialog()
+            st.rerun()
+
+
+@st.dialog("⚡ 執行動作", width="large")
+def execute_action_on_room_dialog(room: Room):
+    """在房間所有設備上執行動作對話框"""
+    st.subheader(f"⚡ 批量執行動作 - {room.display_name}")
+    
+    # 獲取房間內設備
+    room_devices = st.session_state.room_registry.get_room_devices(
+        room.room_id,
+        st.session_state.device_registry
+    )
+    
+    if not room_devices:
+        st.warning("⚠️ 房間內沒有設備")
+        if st.button("關閉"):
+            close_dialog()
+            st.rerun()
+        return
+    
+    # 顯示設備信息
+    buckets = _partition_by_status(room_devices)
+    online_devices = buckets[DeviceStatus.ONLINE]
+    offline_devices = buckets[DeviceStatus.OFFLINE]
+    not_connected_devices = buckets[DeviceStatus.NOT_CONNECTED]
+    
+    st.info(f"📱 房間內設備：共 {len(room_devices)} 台（🟢 在線 {len(online_devices)} 台，🟠 離線 {len(offline_devices)} 台，⚫ 未連接 {len(not_connected_devices)} 台）")
+    
+    if not online_devices:
+        st.warning("⚠️ 沒有在線設備，無法執行動作")
+        if st.button("關閉"):
+            close_dialog()
             st.rerun()
+        return
+    
+    st.caption("💡 動作將在所有在線設備上執行")
+    
+    st.markdown("---")
+    
+    # 獲取所有動作
+    all_actions = st.session_state.action_registry.get_all_actions()
+    
+    if not all_actions:
+        st.info("📝 還沒有任何動作，請先前往動作管理頁面創建動作")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("➕ 前往動作管理", use_container_width=True, type="primary"):
+                st.switch_page("pages/3_⚡_動作管理.py")
+        with col2:
+            if st.button("❌ 關閉", use_container_width=True):
+                close_dialog()
+                st.rerun()
+        return
+    
+    # 動作選擇與執行區塊以 fragment 渲染，切換動作時不必重跑上方的設備統計
+    _render_room_action_runner(room, online_devices, all_actions)
 
 
 @st.dialog("🔌 重新連接設備", width="large")
 def reconnect_room_devices_dialog(room: Room):
     """重新連接房間內設備對話框"""
-    # 隱藏對話框右上角的關閉按鈕
-    st.markdown("""
-        <style>
-        /* 隱藏對話框的關閉按鈕 - 使用多種選擇器確保覆蓋 */
-        button[kind="header"] {
-            display: none !important;
-        }
-        
-        button[aria-label="Close"] {
-            display: none !important;
-        }
-        
-        div[data-testid="stDialog"] button[kind="header"] {
-            display: none !important;
-        }
-        
-        /* 針對可能的內部類名 */
-        button.st-emotion-cache-ue6h4q,
-        button.st-emotion-cache-7oyrr6 {
-            display: none !important;
-        }
-        
-        /* 通過屬性選擇器 */
-        button[data-baseweb="button"][kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     st.subheader(f"🔌 重新連接設備 - {room.display_name}")
     st.caption("💡 檢查房間內設備的連接狀態，並嘗試重新連接不在線的設備")
     
@@ -1116,125 +1256,70 @@ def reconnect_room_devices_dialog(room: Room):
         st.session_state.device_registry
     )
     
-    # 按設備管理頁面的排序方式排序
-    room_devices.sort(key=lambda d: d.sort_order)
-    
     if not room_devices:
         st.warning("⚠️ 房間內沒有設備")
         if st.button("關閉"):
-            st.session_state[f'show_reconnect_room_{room.room_id}'] = False
+            close_dialog()
             st.rerun()
         return
     
     # 獲取當前 ADB 連接的設備列表
-    adb_devices = st.session_state.adb_manager.get_devices()
+    adb_devices = _adb_devices_cached()
     # 創建 serial -> state 的映射
     adb_device_map = {d['serial']: d['state'] for d in adb_devices}
+    adb_keys = adb_device_map.keys()
     
     # 檢查每個設備的連接狀態
     devices_to_reconnect = []
     devices_status = []
     
     for device in room_devices:
-        # 構建可能的連接字串
-        possible_serials = [device.serial]
-        if device.ip:
-            possible_serials.append(f"{device.ip}:{device.port}")
+        # 可能的連接字串與 adb devices 列表取交集，查找設備的 ADB 狀態
+        possible_serials = {device.serial, device.endpoint} if device.ip else {device.serial}
+        hit = next(iter(possible_serials & adb_keys), None)
+        adb_state = adb_device_map.get(hit)
+        
+        # 根據設備狀態和 ADB 狀態判斷（查表取代 if/elif 鏈）
+        entry = _RECONNECT_BY_ADB_STATE.get((device.status, adb_state)) or _RECONNECT_BY_STATUS.get(device.status)
+        if entry is None:
+            # 其他狀態
+            status, reason, needs_reconnect = '無法連接', f'設備狀態：{device.status}', False
+        else:
+            status, reason, needs_reconnect = entry
         
-        # 查找設備在 adb devices 中的狀態
-        adb_state = None
-        for serial in possible_serials:
-            if serial in adb_device_map:
-                adb_state = adb_device_map[serial]
-                break
+        if not device.ip and (needs_reconnect or entry is None):
+            status, reason, needs_reconnect = '無法連接', '設備沒有 IP 地址', False
         
-        # 根據設備狀態和 ADB 狀態判斷
-        if device.status == DeviceStatus.NOT_CONNECTED and device.ip:
-            # 未連接狀態且有 IP → 需要重新連接
+        if needs_reconnect:
             devices_to_reconnect.append(device)
-            devices_status.append({
-                'device': device,
-                'status': '需要重新連接',
-                'reason': '設備未連接（不在 ADB 列表中）'
-            })
-        elif device.status == DeviceStatus.ONLINE:
-            if adb_state == "device":
-                devices_status.append({
-                    'device': device,
-                    'status': '已連接',
-                    'reason': '設備在線（ADB state: device）'
-                })
-            elif adb_state == "offline":
-                devices_status.append({
-                    'device': device,
-                    'status': '離線',
-                    'reason': '設備在 ADB 列表中但狀態為 offline'
-                })
-            else:
-                # 狀態不一致，可能需要重新連接
-                if device.ip:
-                    devices_to_reconnect.append(device)
-                    devices_status.append({
-                        'device': device,
-                        'status': '需要重新連接',
-                        'reason': '設備標記為在線但不在 ADB 列表中'
-                    })
-                else:
-                    devices_status.append({
-                        'device': device,
-                        'status': '無法連接',
-                        'reason': '設備沒有 IP 地址'
-                    })
-        elif device.status == DeviceStatus.OFFLINE:
-            devices_status.append({
-                'device': device,
-                'status': '跳過',
-                'reason': '設備狀態為離線（ADB state: offline），不需要重新連接'
-            })
-        else:
-            # 其他狀態
-            if device.ip:
-                devices_status.append({
-                    'device': device,
-                    'status': '無法連接',
-                    'reason': f'設備狀態：{device.status}'
-                })
-            else:
-                devices_status.append({
-                    'device': device,
-                    'status': '無法連接',
-                    'reason': '設備沒有 IP 地址'
-                })
+        devices_status.append(ReconnectStatus(device, status, reason))
     
     # 顯示設備狀態
     st.markdown("### 📊 設備連接狀態")
     
-    for status_info in devices_status:
-        device = status_info['device']
-        status = status_info['status']
-        reason = status_info['reason']
-        
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            if status == '需要重新連接':
-                st.markdown(f"**{device.display_name}** - ⚠️ {status}")
-            elif status == '已連接':
-                st.markdown(f"**{device.display_name}** - ✅ {status}")
-            elif status == '跳過':
-                st.markdown(f"**{device.display_name}** - ⏭️ {status}")
-            else:
-                st.markdown(f"**{device.display_name}** - ❌ {status}")
-            st.caption(f"  {reason}")
-        
-        with col2:
-            # 顯示設備狀態圖示
-            status_icon = STATUS_ICONS.get(device.status, "❓")
-            status_text = {
-                DeviceStatus.ONLINE: "🟢 在線",
-                DeviceStatus.OFFLINE: "🟠 離線",
-                DeviceStatus.NOT_CONNECTED: "⚫ 未連接",
-            }.get(device.status, f"{status_icon} {device.status}")
-            st.caption(status_text)
+    # 以單一表格呈現（一個元件，前端虛擬化捲動），取代每台設備多個 markdown/caption 元件
+    st.dataframe(
+        [
+            {
+                "device": device.display_name,
+                "status": f"{_RECONNECT_STATUS_ICONS.get(status, '❌')} {status}",
+                "reason": reason,
+                "device_status": _DEVICE_STATUS_TEXT.get(
+                    device.status,
+                    f"{STATUS_ICONS.get(device.status, '❓')} {device.status}"
+                ),
+            }
+            for device, status, reason in devices_status
+        ],
+        column_config={
+            "device": st.column_config.TextColumn("設備"),
+            "status": st.column_config.TextColumn("連接狀態"),
+            "reason": st.column_config.TextColumn("原因", width="large"),
+            "device_status": st.column_config.TextColumn("設備狀態"),
+        },
+        hide_index=True,
+        use_container_width=True
+    )
     
     st.markdown("---")
     
@@ -1251,11 +1336,13 @@ def reconnect_room_devices_dialog(room: Room):
         if devices_to_reconnect:
             if st.button("🔌 開始重新連接", type="primary", use_container_width=True):
                 with st.spinner("正在重新連接設備..."):
-                    # 準備設備列表（IP 和 Port）
-                    devices_list = [(device.ip, device.port) for device in devices_to_reconnect if device.ip]
-                    
-                    # 創建設備映射（用於查找結果對應的設備）
-                    device_map = {f"{device.ip}:{device.port}": device for device in devices_to_reconnect if device.ip}
+                    # 單次遍歷：準備設備列表（IP 和 Port）並建立映射（用於查找結果對應的設備）
+                    devices_list = []
+                    device_map = {}
+                    for device in devices_to_reconnect:
+                        if device.ip:
+                            devices_list.append((device.ip, device.port))
+                            device_map[device.endpoint] = device
                     
                     # 進度顯示
                     progress_text = st.empty()
@@ -1311,7 +1398,7 @@ def reconnect_room_devices_dialog(room: Room):
                     logger.info(f"🔌 重新連接完成: {room.display_name} (成功: {success_count}, 失敗: {fail_count})")
                     
                     time.sleep(2)
-                    st.session_state[f'show_reconnect_room_{room.room_id}'] = False
+                    close_dialog()
                     st.rerun()
         else:
             st.button("🔌 開始重新連接", use_container_width=True, disabled=True)
@@ -1319,48 +1406,21 @@ def reconnect_room_devices_dialog(room: Room):
     
     with col2:
         if st.button("❌ 取消", use_container_width=True):
-            st.session_state[f'show_reconnect_room_{room.room_id}'] = False
+            close_dialog()
             st.rerun()
 
 
 @st.dialog("⚡ 執行動作", width="large")
 def execute_device_action_dialog(device, room: Optional[Room] = None):
     """在設備上執行動作對話框（房間視圖使用）"""
-    # 隱藏對話框右上角的關閉按鈕
-    st.markdown("""
-        <style>
-        /* 隱藏對話框的關閉按鈕 - 使用多種選擇器確保覆蓋 */
-        button[kind="header"] {
-            display: none !important;
-        }
-        
-        button[aria-label="Close"] {
-            display: none !important;
-        }
-        
-        div[data-testid="stDialog"] button[kind="header"] {
-            display: none !important;
-        }
-        
-        /* 針對可能的內部類名 */
-        button.st-emotion-cache-ue6h4q,
-        button.st-emotion-cache-7oyrr6 {
-            display: none !important;
-        }
-        
-        /* 通過屬性選擇器 */
-        button[data-baseweb="button"][kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    now = datetime.now()
     
     st.subheader(f"📱 目標設備：{device.display_name}")
     
     if not device.is_online:
         st.warning("⚠️ 設備離線，請先連線後再執行動作")
         if st.button("關閉"):
-            st.session_state[f'execute_action_on_{device.device_id}'] = False
+            close_dialog()
             st.rerun()
         return
     
@@ -1377,7 +1437,7 @@ def execute_device_action_dialog(device, room: Optional[Room] = None):
                 st.switch_page("pages/3_⚡_動作管理.py")
         with col2:
             if st.button("❌ 關閉", use_container_width=True):
-                st.session_state[f'execute_action_on_{device.device_id}'] = False
+                close_dialog()
                 st.rerun()
         return
     
@@ -1411,8 +1471,7 @@ def execute_device_action_dialog(device, room: Optional[Room] = None):
             if selected_action.execution_count > 0:
                 st.markdown(f"**成功率**: {selected_action.success_rate:.0f}%")
             if selected_action.last_executed_at:
-                from datetime import datetime
-                time_diff = datetime.now() - selected_action.last_executed_at
+                time_diff = now - selected_action.last_executed_at
                 if time_diff.days > 0:
                     last_exec = f"{time_diff.days} 天前"
                 elif time_diff.seconds >= 3600:
@@ -1458,19 +1517,18 @@ def execute_device_action_dialog(device, room: Optional[Room] = None):
                 st.session_state.action_registry.update_action(selected_action)
                 
                 if success:
-                    st.success(f"✅ {message}")
+                    queue_toast(message, "✅")
                     logger.info(f"✅ 執行動作成功: {selected_action.display_name} -> {device.display_name}")
                 else:
-                    st.error(f"❌ {message}")
+                    queue_toast(message, "❌")
                     logger.error(f"❌ 執行動作失敗: {selected_action.display_name} -> {device.display_name}")
                 
-                time.sleep(1.5)
-                st.session_state[f'execute_action_on_{device.device_id}'] = False
+                close_dialog()
                 st.rerun()
     
     with col2:
         if st.button("❌ 取消", use_container_width=True):
-            st.session_state[f'execute_action_on_{device.device_id}'] = False
+            close_dialog()
             st.rerun()
 
 
@@ -1482,35 +1540,6 @@ def room_view_dialog(room: Room):
     ensure_initialization()
     ensure_room_registry()
     
-    # 隱藏對話框右上角的關閉按鈕
-    st.markdown("""
-        <style>
-        /* 隱藏對話框的關閉按鈕 - 使用多種選擇器確保覆蓋 */
-        button[kind="header"] {
-            display: none !important;
-        }
-        
-        button[aria-label="Close"] {
-            display: none !important;
-        }
-        
-        div[data-testid="stDialog"] button[kind="header"] {
-            display: none !important;
-        }
-        
-        /* 針對可能的內部類名 */
-        button.st-emotion-cache-ue6h4q,
-        button.st-emotion-cache-7oyrr6 {
-            display: none !important;
-        }
-        
-        /* 通過屬性選擇器 */
-        button[data-baseweb="button"][kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     # 房間信息
     st.markdown(f"## {room.display_name}")
     
@@ -1523,12 +1552,10 @@ def room_view_dialog(room: Room):
         st.session_state.device_registry
     )
     
-    # 按設備管理頁面的排序方式排序
-    room_devices.sort(key=lambda d: d.sort_order)
-    
-    online_devices = [d for d in room_devices if d.status == DeviceStatus.ONLINE]
-    offline_devices = [d for d in room_devices if d.status == DeviceStatus.OFFLINE]
-    not_connected_devices = [d for d in room_devices if d.status == DeviceStatus.NOT_CONNECTED]
+    buckets = _partition_by_status(room_devices)
+    online_devices = buckets[DeviceStatus.ONLINE]
+    offline_devices = buckets[DeviceStatus.OFFLINE]
+    not_connected_devices = buckets[DeviceStatus.NOT_CONNECTED]
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -1558,19 +1585,17 @@ def room_view_dialog(room: Room):
     
     with col1:
         if st.button("⚡ 執行動作", use_container_width=True, type="primary"):
-            st.session_state[f'show_room_view_{room.room_id}'] = False
-            st.session_state[f'show_execute_action_room_{room.room_id}'] = True
+            open_dialog('execute_action_room', room.room_id)
             st.rerun()
     
     with col2:
         if st.button("➕ 管理設備", use_container_width=True):
-            st.session_state[f'show_room_view_{room.room_id}'] = False
-            st.session_state[f'show_manage_devices_{room.room_id}'] = True
+            open_dialog('manage_devices', room.room_id)
             st.rerun()
     
     with col3:
         if st.button("❌ 關閉", use_container_width=True):
-            st.session_state[f'show_room_view_{room.room_id}'] = False
+            close_dialog()
             st.rerun()
     
     st.markdown("---")
@@ -1604,66 +1629,17 @@ def room_view_dialog(room: Room):
                             room.socket_port
                         )
                         if success:
-                            st.success("✅ Socket Server 已重啟")
-                            time.sleep(1)
+                            queue_toast("Socket Server 已重啟", "✅")
                             st.rerun()
                         else:
+                            invalidate_started_rooms(room.room_id)
                             st.error(f"❌ {msg}")
         
         # 日誌視窗和命令輸入
         tab1, tab2 = st.tabs(["📋 日誌監看", "⌨️ 命令發送"])
         
         with tab1:
-            # 日誌視窗
-            from core.socket_client import read_socket_server_log
-            
-            # 讀取日誌
-            log_lines = read_socket_server_log(room.room_id, room.socket_port, lines=200)
-            
-            if log_lines:
-                # 顯示日誌（只讀文本框）
-                log_text = ''.join(log_lines)
-                # 使用動態 key 強制刷新 UI
-                import time
-                st.text_area(
-                    "Socket Server 日誌",
-                    value=log_text,
-                    height=300,
-                    disabled=True,
-                    key=f"socket_log_{room.room_id}_{int(time.time())}"
-                )
-                
-                # 自動滾動到底部
-                import streamlit.components.v1 as components
-                # 使用當前時間戳確保 JS 每次都會重新執行
-                current_time = int(time.time() * 1000)
-                js = f"""
-                <script>
-                    // Timestamp: {current_time}
-                    function scrollBottom() {{
-                        var textAreas = window.parent.document.querySelectorAll('textarea');
-                        for (var i = 0; i < textAreas.length; i++) {{
-                            if (textAreas[i].getAttribute('aria-label') === 'Socket Server 日誌') {{
-                                textAreas[i].scrollTop = textAreas[i].scrollHeight;
-                                break;
-                            }}
-                        }}
-                    }}
-                    // 嘗試多次滾動以確保渲染完成
-                    setTimeout(scrollBottom, 100);
-                    setTimeout(scrollBottom, 300);
-                    setTimeout(scrollBottom, 500);
-                </script>
-                """
-                components.html(js, height=0)
-                
-                # 刷新按鈕
-                if st.button("🔄 刷新日誌", key=f"refresh_log_{room.room_id}"):
-                    st.rerun()
-            else:
-                st.info("📝 日誌文件不存在或為空")
-                if st.button("🔄 刷新日誌", key=f"refresh_log_{room.room_id}"):
-                    st.rerun()
+            render_socket_log_panel(room.room_id, room.socket_port)
         
         with tab2:
             # 命令輸入欄
@@ -1694,15 +1670,10 @@ def room_view_dialog(room: Room):
                 )
             elif command_type == "send_params":
 
-                # 序列化所有參數
-                params_list = [p.to_transport() for p in room.parameters] if room.parameters else []
-                # 構建完整 payload (如果需要包裹在某個 key 中，例如 'parameters')
+                # 序列化所有參數（參數未變更時直接使用快取）
                 # 根據用戶描述："send parameters will put all room parameters in json way"
                 # 我們發送一個包含 parameters 列表的 JSON
-                payload = params_list
-                
-                # 為了顯示漂亮，轉為字串
-                json_str = json.dumps(payload, ensure_ascii=False, indent=2)
+                _, json_str = _room_params_payload(room.parameters_revision, room.parameters)
                 
                 st.text_area(
                     "發送內容預覽",
@@ -1720,32 +1691,28 @@ def room_view_dialog(room: Room):
             with col1:
                 if st.button("📤 發送命令", type="primary", use_container_width=True, key=f"send_command_{room.room_id}"):
                     if socket_running:
-                        from core.socket_client import SocketClient
-                        
                         try:
-                            with SocketClient(room.socket_ip, room.socket_port) as client:
-                                # 準備數據
-                                data = None
-                                if command_type == "echo" and command_data:
-                                    data = {"text": command_data}
-                                elif command_type == "command" and command_data:
-                                    try:
-                                        data = json.loads(command_data)
-                                    except json.JSONDecodeError:
-                                        st.error("❌ 無效的 JSON 格式")
-                                        st.stop()
-                                elif command_type == "send_params":
-                                    # 直接使用參數列表
-                                    data = [p.to_transport() for p in room.parameters] if room.parameters else []
-                                
-                                # 發送命令
-                                success, response = client.send_command(command_type, data)
-                                
-                                if success:
-                                    st.success("✅ 命令發送成功")
-                                    st.json(response)
-                                else:
-                                    st.error(f"❌ 命令發送失敗: {response.get('message', '未知錯誤')}")
+                            # 準備數據
+                            data = None
+                            if command_type == "echo" and command_data:
+                                data = {"text": command_data}
+                            elif command_type == "command" and command_data:
+                                valid, data = _parse_command_json(room.room_id, command_data)
+                                if not valid:
+                                    st.error("❌ 無效的 JSON 格式")
+                                    st.stop()
+                            elif command_type == "send_params":
+                                # 直接使用參數列表
+                                data, _ = _room_params_payload(room.parameters_revision, room.parameters)
+                            
+                            # 發送命令（單一房間，沿用房間的持久連線）
+                            success, response = send_room_command(room, command_type, data)
+                            
+                            if success:
+                                st.success("✅ 命令發送成功")
+                                st.json(response)
+                            else:
+                                st.error(f"❌ 命令發送失敗: {response.get('message', '未知錯誤')}")
                         except Exception as e:
                             st.error(f"❌ 連接失敗: {str(e)}")
                     else:
@@ -1778,9 +1745,10 @@ def room_view_dialog(room: Room):
     
     st.markdown("### 📱 房間內設備")
     
-    # 獲取設備詳細狀態
-    from config.settings import DEVICE_UPDATE_INTERVAL
-    import time as time_module
+    # 一次並發查詢所有在線設備的詳細狀態，傳給各標籤頁共用
+    status_by_conn = _cached_device_status_batch(
+        tuple(device.connection_string for device in online_devices)
+    )
     
     # 使用標籤頁分隔不同狀態的設備
     tabs_data = []
@@ -1797,130 +1765,220 @@ def room_view_dialog(room: Room):
         tabs = st.tabs(tab_names)
         for tab, (name, devs) in zip(tabs, tabs_data):
             with tab:
-                render_devices_in_room(devs, room)
+                render_devices_in_room(devs, room, status_by_conn)
     elif len(tabs_data) == 1:
         # 只有一種狀態，直接顯示
         _, devs = tabs_data[0]
-        render_devices_in_room(devs, room)
+        render_devices_in_room(devs, room, status_by_conn)
 
 
-def render_devices_in_room(devices, room):
-    """在房間視圖中渲染設備卡片"""
-    from config.constants import STATUS_ICONS
-    from datetime import datetime
-    import time as time_module
+def render_devices_in_room(devices, room, status_by_conn: dict):
+    """
+    在房間視圖中渲染設備卡片
+    
+    Args:
+        devices: 要渲染的設備列表
+        room: 所屬房間
+        status_by_conn: 預先批量查詢的設備狀態 {connection_string: status_dict}
+    """
+    # 每台設備的圖示、在線狀態與詳細狀態在進入網格前一次解析
+    resolved = [
+        (
+            device,
+            STATUS_ICONS.get(device.status, "❓"),
+            device.is_online,
+            status_by_conn.get(device.connection_string),
+        )
+        for device in devices
+    ]
     
-    # 使用網格佈局（每行 2 個卡片）
+    # 使用網格佈局（2 欄，只建立一次欄位，卡片依序交替放入）
     cols_per_row = 2
-    for i in range(0, len(devices), cols_per_row):
-        cols = st.columns(cols_per_row)
-        for j, device in enumerate(devices[i:i+cols_per_row]):
-            with cols[j]:
-                # 狀態圖示
-                status_icon = STATUS_ICONS.get(device.status, "❓")
+    cols = st.columns(cols_per_row)
+    for idx, (device, status_icon, is_online, device_status) in enumerate(resolved):
+        with cols[idx % cols_per_row]:
+            render_room_device_card(device, room, status_icon, is_online, device_status)
+
+
+@st.fragment
+def render_room_device_card(device, room, status_icon: str, is_online: bool, device_status: Optional[dict]):
+    """
+    渲染房間視圖中的單張設備卡片
+    
+    以 fragment 渲染：卡片內的按鈕（例如監看設備）只會重跑這張卡片；
+    需要打開其他對話框或變更房間成員時才以 st.rerun() 完整重跑。
+    
+    Args:
+        device: 設備
+        room: 所屬房間
+        status_icon: 狀態圖示
+        is_online: 是否在線
+        device_status: 預先批量查詢的詳細狀態（可能為 None）
+    """
+    # 卡片容器
+    with st.container(border=True):
+        # 頂部：標題和選單按鈕
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.markdown(f"#### {status_icon} {device.display_name}")
+        with col2:
+            # 使用 popover 讓選單在按鈕正下方展開
+            with st.popover("⋮", use_container_width=False):
+                st.markdown("**操作選單**")
                 
-                # 卡片容器
-                with st.container(border=True):
-                    # 頂部：標題和選單按鈕
-                    col1, col2 = st.columns([4, 1])
-                    with col1:
-                        st.markdown(f"#### {status_icon} {device.display_name}")
-                    with col2:
-                        # 使用 popover 讓選單在按鈕正下方展開
-                        with st.popover("⋮", use_container_width=False):
-                            st.markdown("**操作選單**")
-                            
-                            # 執行動作
-                            if device.is_online:
-                                if st.button("⚡ 執行動作", key=f"room_dev_action_{device.device_id}", use_container_width=True):
-                                    # 關閉房間視圖，打開執行動作對話框
-                                    # 保存房間信息到 session state，以便在對話框中使用
-                                    st.session_state[f'execute_action_room_{device.device_id}'] = room.room_id
-                                    st.session_state[f'show_room_view_{room.room_id}'] = False
-                                    st.session_state[f'execute_action_on_{device.device_id}'] = True
-                                    st.rerun()
-                            else:
-                                st.button("⚡ 執行動作", key=f"room_dev_action_{device.device_id}", use_container_width=True, disabled=True)
-                                st.caption("（設備離線）")
-                            
-                            # 監看設備
-                            if device.is_online:
-                                if st.button("📺 監看設備", key=f"room_dev_monitor_{device.device_id}", use_container_width=True):
-                                    success, message = st.session_state.adb_manager.start_scrcpy(
-                                        device.connection_string,
-                                        window_title=f"{device.display_name} - {room.name}"
-                                    )
-                                    if success:
-                                        st.success(f"✅ {message}")
-                                    else:
-                                        st.error(f"❌ {message}")
-                                    time_module.sleep(0.5)
-                            
-                            st.divider()
-                            
-                            # 移出房間
-                            if st.button("🚪 移出房間", key=f"room_dev_remove_{device.device_id}", use_container_width=True, type="secondary"):
-                                success, msg = st.session_state.room_registry.remove_device_from_room(
-                                    room.room_id,
-                                    device.device_id
-                                )
-                                if success:
-                                    st.success(f"✅ {msg}")
-                                    time_module.sleep(0.5)
-                                    st.rerun()
-                                else:
-                                    st.error(f"❌ {msg}")
-                    
-                    # 設備信息
-                    st.caption(f"序號: {device.serial}")
+                # 執行動作
+                if is_online:
+                    if st.button("⚡ 執行動作", key=f"room_dev_action_{device.device_id}", use_container_width=True):
+                        # 關閉房間視圖，打開執行動作對話框
+                        # 保存房間信息到 session state，以便在對話框中使用
+                        st.session_state._flags[('execute_action_room', device.device_id)] = room.room_id
+                        open_dialog('execute_device_action', device.device_id)
+                        st.rerun()
+                else:
+                    st.button("⚡ 執行動作", key=f"room_dev_action_{device.device_id}", use_container_width=True, disabled=True)
+                    st.caption("（設備離線）")
+                
+                # 監看設備
+                if is_online:
+                    if st.button("📺 監看設備", key=f"room_dev_monitor_{device.device_id}", use_container_width=True):
+                        success, message = st.session_state.adb_manager.start_scrcpy(
+                            device.connection_string,
+                            window_title=f"{device.display_name} - {room.name}"
+                        )
+                        if success:
+                            st.toast(message, icon="✅")
+                            # 下一次執行時確認 scrcpy 是否啟動失敗（立即結束）
+                            st.session_state.setdefault('_scrcpy_pending', {})[device.connection_string] = device.display_name
+                        else:
+                            st.toast(message, icon="❌")
+                
+                st.divider()
+                
+                # 移出房間
+                if st.button("🚪 移出房間", key=f"room_dev_remove_{device.device_id}", use_container_width=True, type="secondary"):
+                    success, msg = st.session_state.room_registry.remove_device_from_room(
+                        room.room_id,
+                        device.device_id
+                    )
+                    if success:
+                        # 房間成員變更，需要完整重跑
+                        queue_toast(msg, "✅")
+                        st.rerun()
+                    else:
+                        st.error(f"❌ {msg}")
+        
+        # 設備信息
+        st.caption(f"序號: {device.serial}")
+        
+        if device.notes:
+            st.caption(f"備註: {device.notes}")
+        
+        # 連線信息
+        if is_online:
+            st.success(f"🟢 在線 - {device.connection_string}")
+            
+            if device_status:
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    if device_status.get('battery_level') is not None:
+                        battery = device_status['battery_level']
+                        st.metric("電量", f"{battery}%")
                     
-                    if device.notes:
-                        st.caption(f"備註: {device.notes}")
+                    if device_status.get('temperature') is not None:
+                        temp = device_status['temperature']
+                        st.metric("溫度", f"{temp}°C")
+                
+                with col2:
+                    if device_status.get('is_awake') is not None:
+                        awake_status = "👁️ 清醒" if device_status['is_awake'] else "😴 休眠"
+                        st.caption(awake_status)
                     
-                    # 連線信息
-                    if device.is_online:
-                        st.success(f"🟢 在線 - {device.connection_string}")
-                        
-                        # 獲取詳細狀態
-                        device_status = st.session_state.adb_manager.get_device_status(device.connection_string)
-                        
-                        if device_status:
-                            col1, col2 = st.columns(2)
-                            
-                            with col1:
-                                if device_status.get('battery_level') is not None:
-                                    battery = device_status['battery_level']
-                                    st.metric("電量", f"{battery}%")
-                                
-                                if device_status.get('temperature') is not None:
-                                    temp = device_status['temperature']
-                                    st.metric("溫度", f"{temp}°C")
-                            
-                            with col2:
-                                if device_status.get('is_awake') is not None:
-                                    awake_status = "👁️ 清醒" if device_status['is_awake'] else "😴 休眠"
-                                    st.caption(awake_status)
-                                
-                                if device_status.get('uptime_seconds') is not None:
-                                    uptime = device_status['uptime_seconds']
-                                    hours = uptime // 3600
-                                    minutes = (uptime % 3600) // 60
-                                    st.caption(f"⏱️ 運行時間: {hours}h {minutes}m")
-                    else:
-                        st.error("🔴 離線")
+                    if device_status.get('uptime_seconds') is not None:
+                        uptime = device_status['uptime_seconds']
+                        hours = uptime // 3600
+                        minutes = (uptime % 3600) // 60
+                        st.caption(f"⏱️ 運行時間: {hours}h {minutes}m")
+        else:
+            st.error("🔴 離線")
+
+
+def _status_refresh_state() -> dict:
+    """取得整個頁面共用的狀態刷新自適應狀態（所有房間設備狀態的雜湊、最後變化時間）"""
+    if '_status_refresh' not in st.session_state:
+        st.session_state._status_refresh = {'hash': None, 'changed_at': time.monotonic(), 'controller_rerun': False}
+    return st.session_state._status_refresh
+
 
+def _update_status_refresh(now: float) -> int:
+    """
+    以所有房間的設備狀態更新自適應狀態，返回目前應使用的刷新間隔（秒）
+    
+    間隔依狀態未變化的持續時間決定（而非重跑次數）
+    """
+    state = _status_refresh_state()
+    room_registry = st.session_state.room_registry
+    room_devices = _cached_all_room_devices(id(room_registry), room_registry.version)
+    status_hash = hash(tuple(
+        (d.device_id, d.status) for devices in room_devices.values() for d in devices
+    ))
+    if status_hash != state['hash']:
+        state['hash'] = status_hash
+        state['changed_at'] = now
+    return STATUS_REFRESH_LEVELS[bisect_right(_STATUS_REFRESH_THRESHOLDS, now - state['changed_at'])]
 
+
+def _status_refresh_controller(refresh_interval: int):
+    """
+    整個頁面唯一的刷新間隔控制器（以 fragment 隨房間狀態一起定時執行）
+    
+    fragment 的 run_every 只在完整執行時註冊，間隔級別改變時由這裡發出一次 st.rerun()；
+    每個級別變化最多一次完整重跑，與房間數量無關
+    """
+    if _update_status_refresh(time.monotonic()) != refresh_interval:
+        _status_refresh_state()['controller_rerun'] = True
+        st.rerun()
+
+
+def render_room_status(room: Room):
+    """
+    渲染房間卡片的狀態統計（以 fragment 定時刷新，不會重跑整個頁面）
+    
+    Args:
+        room: 房間
+    """
+    # 獲取房間內設備（所有卡片共用一次批量查詢並短時間快取，避免每次自動刷新都重新查詢）
+    room_registry = st.session_state.room_registry
+    room_devices = _cached_all_room_devices(id(room_registry), room_registry.version).get(room.room_id, [])
+    status_counts = Counter(d.status for d in room_devices)
+    
+    # Streamlit 會清除 fragment 重跑時沒有輸出的元素，因此內容不變也要輸出；
+    # 相同的元素前端不會重新繪製
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("設備數量", room.capacity_text)
+    
+    with col2:
+        st.metric("🟢 在線", status_counts.get(DeviceStatus.ONLINE, 0))
+    
+    with col3:
+        st.metric("🟠 離線", status_counts.get(DeviceStatus.OFFLINE, 0))
+    
+    with col4:
+        st.metric("⚫ 未連接", status_counts.get(DeviceStatus.NOT_CONNECTED, 0))
+
+
+@st.fragment
 def render_room_card(room: Room):
-    """渲染房間卡片"""
-    # 獲取房間內設備
-    room_devices = st.session_state.room_registry.get_room_devices(
-        room.room_id,
-        st.session_state.device_registry
-    )
+    """
+    渲染房間卡片（fragment）
     
-    online_count = len([d for d in room_devices if d.status == DeviceStatus.ONLINE])
-    offline_count = len([d for d in room_devices if d.status == DeviceStatus.OFFLINE])
-    not_connected_count = len([d for d in room_devices if d.status == DeviceStatus.NOT_CONNECTED])
+    卡片內的按鈕只會先重跑這張卡片；需要打開對話框時才以 st.rerun()
+    完整重跑，不再是「整頁重跑 + st.rerun() 再整頁重跑」兩次
+    """
+    # 操作選單只在展開時才建立按鈕、讀取 Socket Server 狀態
+    menu_key = f'popover_open_{room.room_id}'
     
     # 卡片容器
     with st.container(border=True):
@@ -1934,17 +1992,22 @@ def render_room_card(room: Room):
                 use_container_width=True,
                 type="secondary"
             ):
-                st.session_state[f'show_room_view_{room.room_id}'] = True
+                st.session_state[menu_key] = False
+                open_dialog('room_view', room.room_id)
                 st.rerun()
         with col2:
-            # 使用 popover 讓選單在按鈕正下方展開
-            with st.popover("⋮", use_container_width=False):
+            if st.button("⋮", key=f"btn_room_menu_{room.room_id}", help="操作選單"):
+                st.session_state[menu_key] = not st.session_state.get(menu_key, False)
+        
+        if st.session_state.get(menu_key, False):
+            with st.container(border=True):
                 st.markdown("**操作選單**")
                 
                 # 執行動作
                 if room.device_count > 0:
                     if st.button("⚡ 執行動作", key=f"btn_execute_action_room_{room.room_id}", use_container_width=True):
-                        st.session_state[f'show_execute_action_room_{room.room_id}'] = True
+                        st.session_state[menu_key] = False
+                        open_dialog('execute_action_room', room.room_id)
                         st.rerun()
                 else:
                     st.button("⚡ 執行動作", key=f"btn_execute_action_room_{room.room_id}", use_container_width=True, disabled=True)
@@ -1952,13 +2015,15 @@ def render_room_card(room: Room):
                 
                 # 管理設備
                 if st.button("➕ 管理設備", key=f"btn_manage_devices_{room.room_id}", use_container_width=True):
-                    st.session_state[f'show_manage_devices_{room.room_id}'] = True
+                    st.session_state[menu_key] = False
+                    open_dialog('manage_devices', room.room_id)
                     st.rerun()
                 
                 # 重新連接設備
                 if room.device_count > 0:
                     if st.button("🔌 重新連接", key=f"btn_reconnect_room_{room.room_id}", use_container_width=True):
-                        st.session_state[f'show_reconnect_room_{room.room_id}'] = True
+                        st.session_state[menu_key] = False
+                        open_dialog('reconnect_room', room.room_id)
                         st.rerun()
                 else:
                     st.button("🔌 重新連接", key=f"btn_reconnect_room_{room.room_id}", use_container_width=True, disabled=True)
@@ -1966,15 +2031,13 @@ def render_room_card(room: Room):
                 
                 # 重新啟動 Socket Server
                 if room.socket_ip and room.socket_port:
-                    # 檢查 Socket Server 狀態
-                    is_running = False
-                    if 'socket_server_manager' in st.session_state:
-                        socket_manager = st.session_state.socket_server_manager
-                        is_running = socket_manager.is_server_running(room.room_id)
+                    # Socket Server 狀態（main 在渲染卡片前一次取得的快照）
+                    is_running = room.room_id in st.session_state.get('_socket_running_snapshot', ())
                     
                     status_text = "🟢 運行中" if is_running else "🔴 未運行"
                     if st.button(f"🔄 重啟 Socket Server ({status_text})", key=f"btn_restart_socket_{room.room_id}", use_container_width=True):
-                        st.session_state[f'restart_socket_{room.room_id}'] = True
+                        st.session_state[menu_key] = False
+                        open_dialog('restart_socket', room.room_id)
                         st.rerun()
                     st.caption(f"📡 {room.socket_ip}:{room.socket_port}")
                 
@@ -1982,32 +2045,23 @@ def render_room_card(room: Room):
                 
                 # 編輯房間
                 if st.button("✏️ 編輯房間", key=f"edit_{room.room_id}", use_container_width=True):
-                    st.session_state[f'edit_room_{room.room_id}'] = True
+                    st.session_state[menu_key] = False
+                    open_dialog('edit_room', room.room_id)
                     st.rerun()
                 
                 # 刪除房間
                 if st.button("🗑️ 刪除房間", key=f"delete_{room.room_id}", use_container_width=True, type="secondary"):
-                    st.session_state[f'delete_room_{room.room_id}'] = True
+                    st.session_state[menu_key] = False
+                    open_dialog('delete_room', room.room_id)
                     st.rerun()
         
         # 房間描述
         if room.description:
             st.caption(room.description)
         
-        # 房間統計
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric("設備數量", room.capacity_text)
-        
-        with col2:
-            st.metric("🟢 在線", online_count)
-        
-        with col3:
-            st.metric("🟠 離線", offline_count)
-        
-        with col4:
-            st.metric("⚫ 未連接", not_connected_count)
+        # 房間統計（以頁面共用的自適應間隔定時刷新；有對話框時暫停）
+        refresh_interval = st.session_state.get('_status_refresh_interval')
+        st.fragment(run_every=refresh_interval)(render_room_status)(room)
         
         # 容量警告
         if room.max_devices > 0 and room.device_count >= room.max_devices:
@@ -2016,6 +2070,16 @@ def render_room_card(room: Room):
 
 def main():
     """主函式"""
+    # 顯示上一次執行排入的提示訊息
+    for message, icon in st.session_state.pop('_pending_toasts', []):
+        st.toast(message, icon=icon)
+    
+    # 檢查上次啟動的 scrcpy 是否異常結束（非阻塞 poll）
+    for conn_str, device_name in st.session_state.pop('_scrcpy_pending', {}).items():
+        exit_code = st.session_state.adb_manager.get_scrcpy_exit_code(conn_str)
+        if exit_code:
+            st.toast(f"{device_name} 監看視窗啟動失敗（結束碼 {exit_code}）", icon="❌")
+    
     st.title("🏠 房間管理")
     st.caption("建立和管理房間，批量控制多台設備")
     
@@ -2027,17 +2091,19 @@ def main():
     
     with col2:
         if st.button("➕ 新增房間", use_container_width=True, type="primary"):
-            st.session_state.show_add_room_dialog = True
+            open_dialog('add_room')
             st.rerun()
     
     st.markdown("---")
     
-    # 獲取所有房間
-    rooms = st.session_state.room_registry.get_all_rooms()
+    # 獲取所有房間（以註冊管理器的 id 與版本號作為快取鍵）
+    room_registry = st.session_state.room_registry
+    registry_key = (id(room_registry), room_registry.version)
+    rooms = _cached_all_rooms(*registry_key)
     
     # 顯示統計
     if rooms:
-        stats = st.session_state.room_registry.get_statistics()
+        stats = _cached_room_statistics(*registry_key)
         col1, col2, col3, col4 = st.columns(4)
         
         col1.metric("📊 房間總數", stats.get('total_rooms', 0))
@@ -2051,80 +2117,112 @@ def main():
     if not rooms:
         st.info("🏠 還沒有任何房間，點擊「新增房間」開始創建")
     else:
-        # 使用網格佈局（每行 2 個卡片，增加卡片寬度以顯示更多內容）
+        # 一次查詢所有運行中的 Socket Server，供各房間卡片共用
+        socket_manager = st.session_state.get('socket_server_manager')
+        st.session_state['_socket_running_snapshot'] = (
+            socket_manager.get_running_server_ids() if socket_manager else set()
+        )
+        
+        # 狀態刷新間隔：整個頁面只計算一次；不是控制器發出的完整重跑即為使用者操作，回到最短間隔
+        refresh_state = _status_refresh_state()
+        now = time.monotonic()
+        if not refresh_state['controller_rerun']:
+            refresh_state['changed_at'] = now
+        refresh_state['controller_rerun'] = False
+        refresh_interval = None if has_dialog_open else _update_status_refresh(now)
+        st.session_state['_status_refresh_interval'] = refresh_interval
+        if refresh_interval is not None:
+            st.fragment(run_every=refresh_interval)(_status_refresh_controller)(refresh_interval)
+        
+        # 使用網格佈局（2 欄，只建立一次欄位，卡片依序交替放入；增加卡片寬度以顯示更多內容）
         cols_per_row = 2
-        for i in range(0, len(rooms), cols_per_row):
-            cols = st.columns(cols_per_row)
-            for j, room in enumerate(rooms[i:i+cols_per_row]):
-                with cols[j]:
-                    render_room_card(room)
-    
-    # 處理對話框
-    if st.session_state.get('show_add_room_dialog'):
+        cols = st.columns(cols_per_row)
+        for idx, room in enumerate(rooms):
+            with cols[idx % cols_per_row]:
+                render_room_card(room)
+    
+    # 處理對話框（只分派目前打開的那一個）
+    active_dialog = st.session_state.get('active_dialog')
+    if not active_dialog:
+        return
+    
+    kind, entity_id = active_dialog
+    
+    if kind == 'add_room':
         add_room_dialog()
+        return
     
     # 處理設備執行動作對話框（房間視圖中觸發）
-    all_devices = st.session_state.device_registry.get_all_devices()
-    for device in all_devices:
-        if st.session_state.get(f'execute_action_on_{device.device_id}'):
-            # 獲取房間信息（如果從房間視圖觸發）
-            device_room = None
-            room_id = st.session_state.get(f'execute_action_room_{device.device_id}')
-            if room_id:
-                device_room = st.session_state.room_registry.get_room(room_id)
-            else:
-                # 如果沒有保存的房間 ID，嘗試查找設備所屬的房間
-                device_room = st.session_state.room_registry.get_device_room(device.device_id)
-            execute_device_action_dialog(device, device_room)
+    if kind == 'execute_device_action':
+        device = st.session_state.device_registry.get_device_by_id(entity_id)
+        if not device:
+            close_dialog()
+            return
+        # 獲取房間信息（如果從房間視圖觸發）
+        device_room = None
+        room_id = st.session_state._flags.get(('execute_action_room', device.device_id))
+        if room_id:
+            device_room = st.session_state.room_registry.get_room(room_id)
+        else:
+            # 如果沒有保存的房間 ID，嘗試查找設備所屬的房間
+            device_room = st.session_state.room_registry.get_device_room(device.device_id)
+        execute_device_action_dialog(device, device_room)
+        return
     
     # 處理房間對話框
-    for room in rooms:
-        if st.session_state.get(f'show_room_view_{room.room_id}'):
-            room_view_dialog(room)
-        
-        if st.session_state.get(f'edit_room_{room.room_id}'):
-            edit_room_dialog(room)
-        
-        if st.session_state.get(f'delete_room_{room.room_id}'):
-            delete_room_dialog(room)
-        
-        if st.session_state.get(f'show_manage_devices_{room.room_id}'):
-            manage_devices_dialog(room)
-        
-        if st.session_state.get(f'show_execute_action_room_{room.room_id}'):
-            execute_action_on_room_dialog(room)
-        
-        if st.session_state.get(f'show_reconnect_room_{room.room_id}'):
-            reconnect_room_devices_dialog(room)
-        
-        # 處理重新啟動 Socket Server
-        if st.session_state.get(f'restart_socket_{room.room_id}'):
-            if room.socket_ip and room.socket_port:
-                if 'socket_server_manager' in st.session_state:
-                    socket_manager = st.session_state.socket_server_manager
-                    with st.spinner("正在重啟 Socket Server..."):
-                        success, msg = socket_manager.restart_server(
-                            room.room_id,
-                            room.name,
-                            room.socket_ip,
-                            room.socket_port
-                        )
-                        if success:
-                            st.success(f"✅ Socket Server 已重啟: {room.socket_ip}:{room.socket_port}")
-                            logger.info(f"✅ 重啟 Socket Server 成功: {room.name} ({room.socket_ip}:{room.socket_port})")
-                        else:
-                            st.error(f"❌ Socket Server 重啟失敗: {msg}")
-                            logger.error(f"❌ 重啟 Socket Server 失敗: {room.name} - {msg}")
-                        time.sleep(1)
+    rooms_by_id = {r.room_id: r for r in rooms}
+    room = rooms_by_id.get(entity_id)
+    if not room:
+        # 房間已不存在（例如已被刪除）
+        close_dialog()
+        return
+    
+    handler = ROOM_DIALOG_HANDLERS.get(kind)
+    if handler:
+        handler(room)
+    else:
+        close_dialog()
+
+
+def restart_room_socket_server(room: Room):
+    """處理重新啟動 Socket Server（由房間卡片選單觸發）"""
+    if room.socket_ip and room.socket_port:
+        if 'socket_server_manager' in st.session_state:
+            socket_manager = st.session_state.socket_server_manager
+            with st.spinner("正在重啟 Socket Server..."):
+                success, msg = socket_manager.restart_server(
+                    room.room_id,
+                    room.name,
+                    room.socket_ip,
+                    room.socket_port
+                )
+                if success:
+                    queue_toast(f"Socket Server 已重啟: {room.socket_ip}:{room.socket_port}", "✅")
+                    logger.info(f"✅ 重啟 Socket Server 成功: {room.name} ({room.socket_ip}:{room.socket_port})")
                 else:
-                    st.error("❌ Socket Server 管理器未初始化")
-                    time.sleep(1)
-            else:
-                st.warning("⚠️ 此房間未配置 Socket Server")
-                time.sleep(1)
-            
-            st.session_state[f'restart_socket_{room.room_id}'] = False
-            st.rerun()
+                    # 重啟失敗：移除啟動記錄，之後由 ensure_socket_server_manager 重試
+                    invalidate_started_rooms(room.room_id)
+                    queue_toast(f"Socket Server 重啟失敗: {msg}", "❌")
+                    logger.error(f"❌ 重啟 Socket Server 失敗: {room.name} - {msg}")
+        else:
+            queue_toast("Socket Server 管理器未初始化", "❌")
+    else:
+        queue_toast("此房間未配置 Socket Server", "⚠️")
+    
+    close_dialog()
+    st.rerun()
+
+
+# active_dialog 類型 -> 處理函式（房間相關）
+ROOM_DIALOG_HANDLERS = {
+    'room_view': room_view_dialog,
+    'edit_room': edit_room_dialog,
+    'delete_room': delete_room_dialog,
+    'manage_devices': manage_devices_dialog,
+    'execute_action_room': execute_action_on_room_dialog,
+    'reconnect_room': reconnect_room_devices_dialog,
+    'restart_socket': restart_room_socket_server,
+}
 
 
 if __name__ == "__main__":
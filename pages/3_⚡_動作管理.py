@@ -2,57 +2,88 @@
 動作管理頁面
 """
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
-from typing import Optional, List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import heapq
+import os
 import time
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 from core.action import Action, ActionType, ACTION_TYPE_NAMES, ACTION_TYPE_ICONS, COMMON_KEYCODES, ActionParamsValidator
-from core.action_registry import ActionRegistry
 from utils.logger import get_logger
+from utils.style import minify_css
 
 logger = get_logger(__name__)
 
+# 動作類型選項（模組載入時計算一次，避免每次重新執行時重建）
+_ACTION_TYPE_OPTIONS = tuple(ACTION_TYPE_NAMES.keys())
+_ACTION_TYPE_LABELS = tuple(f"{ACTION_TYPE_ICONS[t]} {ACTION_TYPE_NAMES[t]}" for t in _ACTION_TYPE_OPTIONS)
+_ACTION_TYPE_INDEX = {t: i for i, t in enumerate(_ACTION_TYPE_OPTIONS)}
+_FILTER_OPTIONS = ("全部",) + tuple(ACTION_TYPE_NAMES[t] for t in ActionType)
+_FILTER_INDEX = {name: i for i, name in enumerate(_FILTER_OPTIONS)}
+_FILTER_NAME_TO_TYPE = {ACTION_TYPE_NAMES[t]: t for t in ActionType}
 
+
+@lru_cache(maxsize=1)
 def get_apks_directory() -> Path:
-    """獲取 APKs 目錄路徑（相對於 Streamlit 應用根目錄）"""
+    """獲取 APKs 目錄路徑（相對於 Streamlit 應用根目錄，解析結果快取）"""
     # 獲取當前文件的目錄（pages/），然後回到上一級（項目根目錄）
-    current_file = Path(__file__).resolve()
-    project_root = current_file.parent.parent
-    apks_dir = project_root / "apks"
-    return apks_dir
+    return Path(__file__).resolve().parent.parent / "apks"
+
+
+# APK 下拉選單最多列出的文件數（按修改時間取最新的）
+APK_LIST_LIMIT = 100
+
+
+def _iter_apk_entries(dir_str: str) -> Iterator[Tuple[str, str, float]]:
+    """逐一產生 apks 目錄中的 APK 文件 (file_path, file_name, mtime)"""
+    # DirEntry 會快取目錄讀取時得到的檔案類型資訊，避免額外的 stat 系統呼叫
+    with os.scandir(dir_str) as it:
+        for entry in it:
+            if not entry.name.endswith(".apk") or not entry.is_file(follow_symlinks=False):
+                continue
+            yield entry.path, entry.name, entry.stat(follow_symlinks=False).st_mtime
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _scan_apks_cached(dir_str: str, dir_mtime: float) -> List[Tuple[str, str, float]]:
+    """
+    實際掃描 apks 目錄（結果快取）
+    
+    dir_mtime 僅作為快取鍵：目錄內新增/刪除/改名文件會更新目錄本身的
+    mtime，使快取自動失效
+    
+    Returns:
+        最新的 APK_LIST_LIMIT 個 (file_path, file_name, mtime) tuples，
+        按修改時間排序（最新的在前），mtime 為時間戳（float）
+    """
+    return heapq.nlargest(APK_LIST_LIMIT, _iter_apk_entries(dir_str), key=lambda x: x[2])
+
 
+def _format_apk_option(apk_file: Tuple[str, str, float]) -> str:
+    """APK 選項顯示文字：文件名（修改時間）"""
+    _, file_name, mtime = apk_file
+    return f"{file_name} ({datetime.fromtimestamp(mtime):%Y-%m-%d %H:%M:%S})"
 
-def scan_apks_directory() -> List[Tuple[str, str, datetime]]:
+
+def scan_apks_directory() -> List[Tuple[str, str, float]]:
     """
     掃描 apks 目錄，返回所有 APK 文件列表
     
     Returns:
-        List of (file_path, file_name, created_time) tuples
+        List of (file_path, file_name, mtime) tuples，mtime 為時間戳（float）
     """
     apks_dir = get_apks_directory()
     
-    # 如果目錄不存在，創建它
-    if not apks_dir.exists():
+    # 目錄的 stat 同時作為存在檢查與快取鍵；不存在時才創建
+    try:
+        dir_mtime = apks_dir.stat().st_mtime
+    except FileNotFoundError:
         apks_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"創建 APKs 目錄: {apks_dir}")
         return []
     
-    apk_files = []
-    for file_path in apks_dir.glob("*.apk"):
-        if file_path.is_file():
-            # 獲取文件創建時間
-            created_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-            apk_files.append((
-                str(file_path),
-                file_path.name,
-                created_time
-            ))
-    
-    # 按創建時間排序（最新的在前）
-    apk_files.sort(key=lambda x: x[2], reverse=True)
-    
-    return apk_files
+    return _scan_apks_cached(str(apks_dir), dir_mtime)
 
 # 頁面配置
 st.set_page_config(
@@ -61,24 +92,32 @@ st.set_page_config(
     layout="wide"
 )
 
-# 隱藏標題旁的錨點鏈接圖標
-st.markdown("""
+# 頁面樣式：每次執行注入一次（Streamlit 會清除未重新輸出的元素，
+# 因此不能只注入一次；但所有對話框共用，不再各自重複注入）
+PAGE_CSS = minify_css("""
     <style>
     /* 隱藏標題旁的錨點鏈接圖標 */
     a.st-emotion-cache-yinll1,
     a[class*="st-emotion-cache"][href^="#"] {
         display: none !important;
     }
+    
+    /* 隱藏對話框關閉按鈕（所有對話框共用，只限對話框內） */
+    div[data-testid="stDialog"] button[kind="header"],
+    div[role="dialog"] button[kind="header"] {
+        display: none !important;
+    }
     </style>
-""", unsafe_allow_html=True)
+""")
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
 
 # 自動刷新（每 5 秒）- 但在有對話框時暫停
-dialog_keys = [key for key in st.session_state.keys() if key.startswith(('add_action', 'edit_action_', 'delete_action_', 'execute_action_'))]
-dialog_states = {key: st.session_state.get(key, False) for key in dialog_keys}
-has_dialog_open = any(dialog_states.values())
+# 目前打開的對話框記錄在單一 key：(類型, action_id) 或 None
+has_dialog_open = st.session_state.get('active_action_dialog') is not None
 
 # 只在沒有對話框時自動刷新
 if not has_dialog_open:
+    from streamlit_autorefresh import st_autorefresh  # 僅在需要時載入
     count = st_autorefresh(interval=5000, key="action_refresh")
 
 # 初始化系統
@@ -91,8 +130,8 @@ ensure_action_registry()
 ensure_room_registry()  # 需要 room_registry 來查找設備所屬的房間
 
 # Session state 初始化
-if 'show_add_action_dialog' not in st.session_state:
-    st.session_state.show_add_action_dialog = False
+if 'active_action_dialog' not in st.session_state:
+    st.session_state.active_action_dialog = None
 if 'search_keyword' not in st.session_state:
     st.session_state.search_keyword = ""
 if 'filter_type' not in st.session_state:
@@ -103,42 +142,292 @@ if 'use_common_keycode' not in st.session_state:
     st.session_state.use_common_keycode = True
 
 
+def open_action_dialog(kind: str, action_id: Optional[str] = None, menu_key: Optional[str] = None):
+    """
+    打開對話框（kind: add / edit / delete / execute）
+    
+    作為按鈕的 on_click 回呼使用：回呼在腳本執行前就完成，
+    頁首判斷是否掛載自動刷新時已經看得到打開的對話框，不需要額外的 st.rerun()
+    
+    Args:
+        menu_key: 同時收起的卡片操作選單（可選）
+    """
+    st.session_state.active_action_dialog = (kind, action_id)
+    if menu_key:
+        st.session_state[menu_key] = False
+
+
+def close_action_dialog():
+    """關閉目前的對話框"""
+    st.session_state.active_action_dialog = None
+
+
+# 保持喚醒模式選項
+_KEEP_AWAKE_MODE_OPTIONS = {
+    0: "禁用（預設值）",
+    1: "僅 AC 充電時保持喚醒",
+    2: "僅 USB 充電時保持喚醒",
+    3: "AC 和 USB 充電時保持喚醒（推薦）"
+}
+_STOP_METHOD_OPTIONS = ("force-stop", "kill")
+_STOP_METHOD_INDEX = {m: i for i, m in enumerate(_STOP_METHOD_OPTIONS)}
+
+
+# ==================== 動作參數輸入（新增/編輯共用） ====================
+# 每個渲染函式就地修改 params：新增時 params 為空字典（使用預設值），
+# 編輯時為現有參數的副本；key_prefix 讓新增與各個編輯對話框的 widget key 互不衝突
+
+def _render_params_wake_up(params: Dict[str, Any], *, editing: bool, key_prefix: str):
+    """喚醒設備參數"""
+    if not editing:
+        st.info("☀️ 喚醒設備不需要額外參數")
+    params['verify'] = st.checkbox("驗證喚醒成功", value=params.get('verify', True), key=f"{key_prefix}verify")
+
+
+def _render_params_sleep(params: Dict[str, Any], *, editing: bool, key_prefix: str):
+    """休眠設備參數"""
+    if not editing:
+        st.info("😴 休眠設備")
+    params['force'] = st.checkbox(
+        "強制休眠",
+        value=params.get('force', False),
+        help="使用 SLEEP 而非 POWER 鍵",
+        key=f"{key_prefix}force"
+    )
+    params['verify'] = st.checkbox("驗證休眠成功", value=params.get('verify', True), key=f"{key_prefix}verify")
+
+
+def _render_params_keep_awake(params: Dict[str, Any], *, editing: bool, key_prefix: str):
+    """保持喚醒參數"""
+    if not editing:
+        st.info("🔌 保持喚醒（接電源時不進入深度睡眠）")
+        st.caption("💡 設置設備在接上電源時保持喚醒狀態，避免網路功能被關閉")
+    
+    current_mode = params.get('mode', 3)
+    params['mode'] = st.selectbox(
+        "喚醒模式 *",
+        options=list(_KEEP_AWAKE_MODE_OPTIONS.keys()),
+        format_func=lambda x: _KEEP_AWAKE_MODE_OPTIONS[x],
+        index=current_mode if current_mode in _KEEP_AWAKE_MODE_OPTIONS else 3,  # 默認選擇推薦值 3
+        help="選擇設備在接電源時保持喚醒的模式",
+        key=f"{key_prefix}mode"
+    )
+    
+    st.markdown("---")
+    st.markdown("**說明**")
+    st.markdown("- **模式 0**: 禁用此功能，設備會按正常的閒置計時器進入深度睡眠")
+    st.markdown("- **模式 1**: 僅在使用牆上充電器（AC）時保持喚醒")
+    st.markdown("- **模式 2**: 僅在連接電腦 USB 充電時保持喚醒")
+    st.markdown("- **模式 3**: AC 和 USB 充電時都保持喚醒，確保網路功能不被關閉（推薦）")
+
+
+def _render_params_launch_app(params: Dict[str, Any], *, editing: bool, key_prefix: str):
+    """執行程式參數"""
+    if not editing:
+        st.info("🚀 執行程式")
+    params['package'] = st.text_input(
+        "Package 名稱 *",
+        value=params.get('package', ''),
+        placeholder="com.example.app",
+        help="應用程式的 package 名稱",
+        key=f"{key_prefix}package"
+    )
+    params['activity'] = st.text_input(
+        "Activity 名稱（選填）",
+        value=params.get('activity', ''),
+        placeholder=".MainActivity",
+        help="Activity 名稱（以 . 開頭的相對名稱或完整類名）",
+        key=f"{key_prefix}activity"
+    )
+    params['stop_existing'] = st.checkbox(
+        "啟動前先關閉已運行的實例",
+        value=params.get('stop_existing', False),
+        key=f"{key_prefix}stop_existing"
+    )
+    params['wait'] = st.checkbox("等待啟動完成", value=params.get('wait', True), key=f"{key_prefix}wait")
+
+
+def _render_params_stop_app(params: Dict[str, Any], *, editing: bool, key_prefix: str):
+    """關閉程式參數"""
+    if not editing:
+        st.info("🛑 關閉程式")
+    params['package'] = st.text_input(
+        "Package 名稱 *",
+        value=params.get('package', ''),
+        placeholder="com.example.app",
+        help="要關閉的應用程式 package 名稱",
+        key=f"{key_prefix}package"
+    )
+    current_method = params.get('method', 'force-stop')
+    params['method'] = st.selectbox(
+        "關閉方式",
+        options=_STOP_METHOD_OPTIONS,
+        index=_STOP_METHOD_INDEX.get(current_method, 0),
+        help="force-stop 完全停止應用，kill 僅殺進程",
+        key=f"{key_prefix}method"
+    )
+    params['verify'] = st.checkbox("驗證關閉成功", value=params.get('verify', True), key=f"{key_prefix}verify")
+
+
+def _render_params_restart_app(params: Dict[str, Any], *, editing: bool, key_prefix: str):
+    """重啟應用參數"""
+    if not editing:
+        st.info("🔄 重啟應用")
+    params['package'] = st.text_input(
+        "Package 名稱 *",
+        value=params.get('package', ''),
+        placeholder="com.example.app",
+        help="要重啟的應用程式 package 名稱",
+        key=f"{key_prefix}package"
+    )
+    params['activity'] = st.text_input(
+        "Activity 名稱（選填）",
+        value=params.get('activity', ''),
+        placeholder=".MainActivity",
+        help="Activity 名稱（以 . 開頭的相對名稱或完整類名）",
+        key=f"{key_prefix}activity"
+    )
+    params['delay'] = st.number_input(
+        "重啟延遲（秒）",
+        min_value=0,
+        max_value=10,
+        value=params.get('delay', 1),
+        help="關閉後等待多少秒再啟動",
+        key=f"{key_prefix}delay"
+    )
+
+
+def _render_params_send_key(params: Dict[str, Any], *, editing: bool, key_prefix: str):
+    """發送按鍵參數（常用按鍵選擇需即時響應，僅在 form 外的新增對話框提供）"""
+    if not editing:
+        st.info("⌨️ 發送按鍵")
+        
+        # 常用按鍵快速選擇
+        st.markdown("**常用按鍵**")
+        
+        ss = st.session_state
+        current_use_common = ss.use_common_keycode
+        use_common = st.checkbox("使用常用按鍵", value=current_use_common, key="use_common_key_new")
+        if use_common != current_use_common:
+            ss.use_common_keycode = use_common
+    else:
+        use_common = False
+    
+    if use_common:
+        keycode_options = list(COMMON_KEYCODES.keys())
+        keycode_labels = [f"{COMMON_KEYCODES[k]['name']} ({k})" for k in keycode_options]
+        
+        selected_key_index = st.selectbox(
+            "選擇按鍵",
+            options=range(len(keycode_options)),
+            format_func=lambda i: keycode_labels[i],
+            key=f"{key_prefix}common_keycode"
+        )
+        selected_key = keycode_options[selected_key_index]
+        params['keycode'] = COMMON_KEYCODES[selected_key]['code']
+        st.caption(f"說明：{COMMON_KEYCODES[selected_key]['description']}")
+    else:
+        params['keycode'] = st.text_input(
+            "按鍵碼",
+            value=str(params.get('keycode', '')),
+            placeholder="KEYCODE_HOME 或 3",
+            help="輸入按鍵碼名稱或數字",
+            key=f"{key_prefix}keycode"
+        )
+    
+    params['repeat'] = st.number_input(
+        "重複次數",
+        min_value=1,
+        max_value=10,
+        value=params.get('repeat', 1),
+        key=f"{key_prefix}repeat"
+    )
+
+
+def _render_params_install_apk(params: Dict[str, Any], *, editing: bool, key_prefix: str):
+    """安裝 APK 參數"""
+    if not editing:
+        st.info("📦 安裝 APK")
+    
+    # 掃描 apks 目錄
+    apk_files = scan_apks_directory()
+    
+    if not apk_files:
+        st.warning("⚠️ apks 目錄中沒有找到 APK 文件")
+        st.caption(f"請將 APK 文件放到以下目錄：{get_apks_directory()}")
+        params['apk_path'] = params.get('apk_path', '')
+    else:
+        # 找到當前選擇的 APK（如果存在）
+        path_to_index = {file_path: i for i, (file_path, _, _) in enumerate(apk_files)}
+        current_index = path_to_index.get(str(params.get('apk_path', '')), 0)
+        
+        # 以索引選擇，顯示文件名和修改時間（顯示文字每次執行只格式化一次）
+        display_strings = [_format_apk_option(apk_file) for apk_file in apk_files]
+        selected_index = st.selectbox(
+            "選擇 APK 文件 *",
+            options=range(len(apk_files)),
+            index=current_index,
+            format_func=display_strings.__getitem__,
+            help="選擇要安裝的 APK 文件（顯示創建時間以便區分）",
+            key=f"{key_prefix}apk_select"
+        )
+        
+        params['apk_path'] = apk_files[selected_index][0]
+        st.caption(f"📁 路徑：{params['apk_path']}")
+    
+    params['replace'] = st.checkbox(
+        "替換已存在的應用",
+        value=params.get('replace', True),
+        help="如果應用已安裝，是否替換安裝",
+        key=f"{key_prefix}replace"
+    )
+    
+    params['grant_permissions'] = st.checkbox(
+        "自動授予權限",
+        value=params.get('grant_permissions', False),
+        help="安裝時自動授予所有權限",
+        key=f"{key_prefix}grant_permissions"
+    )
+
+
+_PARAM_RENDERERS = {
+    ActionType.WAKE_UP: _render_params_wake_up,
+    ActionType.SLEEP: _render_params_sleep,
+    ActionType.KEEP_AWAKE: _render_params_keep_awake,
+    ActionType.LAUNCH_APP: _render_params_launch_app,
+    ActionType.STOP_APP: _render_params_stop_app,
+    ActionType.RESTART_APP: _render_params_restart_app,
+    ActionType.SEND_KEY: _render_params_send_key,
+    ActionType.INSTALL_APK: _render_params_install_apk,
+}
+
+
 @st.dialog("➕ 新增動作", width="large")
 def add_action_dialog():
     """新增動作對話框"""
-    # 隱藏對話框關閉按鈕
-    st.markdown("""
-        <style>
-        button[kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    # session_state 只取一次引用，後續讀寫都經由區域變數
+    ss = st.session_state
+    current_type = ss.new_action_type
     
     st.subheader("📝 基本資訊")
     
     # 動作類型選擇（在 form 外面，可以實時響應）
-    action_type_options = list(ACTION_TYPE_NAMES.keys())
-    action_type_labels = [f"{ACTION_TYPE_ICONS[t]} {ACTION_TYPE_NAMES[t]}" for t in action_type_options]
-    
     # 找到當前選擇的類型索引
-    try:
-        current_type_index = action_type_options.index(st.session_state.new_action_type)
-    except (ValueError, AttributeError):
-        current_type_index = 0
+    current_type_index = _ACTION_TYPE_INDEX.get(current_type, 0)
     
     selected_type_index = st.selectbox(
         "動作類型 *",
-        options=range(len(action_type_options)),
+        options=range(len(_ACTION_TYPE_OPTIONS)),
         index=current_type_index,
-        format_func=lambda i: action_type_labels[i],
+        format_func=lambda i: _ACTION_TYPE_LABELS[i],
         help="選擇要執行的動作類型",
         key="new_action_type_select"
     )
     
-    # 更新 session state
-    selected_type = action_type_options[selected_type_index]
-    st.session_state.new_action_type = selected_type
+    # 更新 session state（僅在類型改變時寫入）
+    selected_type = _ACTION_TYPE_OPTIONS[selected_type_index]
+    if selected_type != current_type:
+        ss.new_action_type = selected_type
     
     # 動作名稱
     name = st.text_input(
@@ -162,187 +451,7 @@ def add_action_dialog():
     params = {}
     
     # 根據動作類型顯示不同的參數輸入（都在 form 外面）
-    if selected_type == ActionType.WAKE_UP:
-        st.info("☀️ 喚醒設備不需要額外參數")
-        params['verify'] = st.checkbox("驗證喚醒成功", value=True, key="wake_verify")
-    
-    elif selected_type == ActionType.SLEEP:
-        st.info("😴 休眠設備")
-        params['force'] = st.checkbox("強制休眠", value=False, help="使用 SLEEP 而非 POWER 鍵", key="sleep_force")
-        params['verify'] = st.checkbox("驗證休眠成功", value=True, key="sleep_verify")
-    
-    elif selected_type == ActionType.KEEP_AWAKE:
-        st.info("🔌 保持喚醒（接電源時不進入深度睡眠）")
-        st.caption("💡 設置設備在接上電源時保持喚醒狀態，避免網路功能被關閉")
-        
-        mode_options = {
-            0: "禁用（預設值）",
-            1: "僅 AC 充電時保持喚醒",
-            2: "僅 USB 充電時保持喚醒",
-            3: "AC 和 USB 充電時保持喚醒（推薦）"
-        }
-        
-        mode_labels = [f"{k}: {v}" for k, v in mode_options.items()]
-        mode_index = st.selectbox(
-            "喚醒模式 *",
-            options=list(mode_options.keys()),
-            format_func=lambda x: mode_options[x],
-            index=3,  # 默認選擇推薦值 3
-            help="選擇設備在接電源時保持喚醒的模式",
-            key="keep_awake_mode"
-        )
-        params['mode'] = mode_index
-        
-        st.markdown("---")
-        st.markdown("**說明**")
-        st.markdown("- **模式 0**: 禁用此功能，設備會按正常的閒置計時器進入深度睡眠")
-        st.markdown("- **模式 1**: 僅在使用牆上充電器（AC）時保持喚醒")
-        st.markdown("- **模式 2**: 僅在連接電腦 USB 充電時保持喚醒")
-        st.markdown("- **模式 3**: AC 和 USB 充電時都保持喚醒，確保網路功能不被關閉（推薦）")
-    
-    elif selected_type == ActionType.LAUNCH_APP:
-        st.info("🚀 執行程式")
-        params['package'] = st.text_input(
-            "Package 名稱 *",
-            placeholder="com.example.app",
-            help="應用程式的 package 名稱",
-            key="launch_package"
-        )
-        params['activity'] = st.text_input(
-            "Activity 名稱（選填）",
-            placeholder=".MainActivity",
-            help="Activity 名稱（以 . 開頭的相對名稱或完整類名）",
-            key="launch_activity"
-        )
-        params['stop_existing'] = st.checkbox("啟動前先關閉已運行的實例", value=False, key="launch_stop_existing")
-        params['wait'] = st.checkbox("等待啟動完成", value=True, key="launch_wait")
-    
-    elif selected_type == ActionType.STOP_APP:
-        st.info("🛑 關閉程式")
-        params['package'] = st.text_input(
-            "Package 名稱 *",
-            placeholder="com.example.app",
-            help="要關閉的應用程式 package 名稱",
-            key="stop_package"
-        )
-        params['method'] = st.selectbox(
-            "關閉方式",
-            options=["force-stop", "kill"],
-            index=0,
-            help="force-stop 完全停止應用，kill 僅殺進程",
-            key="stop_method"
-        )
-        params['verify'] = st.checkbox("驗證關閉成功", value=True, key="stop_verify")
-    
-    elif selected_type == ActionType.RESTART_APP:
-        st.info("🔄 重啟應用")
-        params['package'] = st.text_input(
-            "Package 名稱 *",
-            placeholder="com.example.app",
-            help="要重啟的應用程式 package 名稱",
-            key="restart_package"
-        )
-        params['activity'] = st.text_input(
-            "Activity 名稱（選填）",
-            placeholder=".MainActivity",
-            help="Activity 名稱（以 . 開頭的相對名稱或完整類名）",
-            key="restart_activity"
-        )
-        params['delay'] = st.number_input(
-            "重啟延遲（秒）",
-            min_value=0,
-            max_value=10,
-            value=1,
-            help="關閉後等待多少秒再啟動",
-            key="restart_delay"
-        )
-    
-    elif selected_type == ActionType.SEND_KEY:
-        st.info("⌨️ 發送按鍵")
-        
-        # 常用按鍵快速選擇
-        st.markdown("**常用按鍵**")
-        
-        use_common = st.checkbox("使用常用按鍵", value=st.session_state.use_common_keycode, key="use_common_key_new")
-        st.session_state.use_common_keycode = use_common
-        
-        if use_common:
-            keycode_options = list(COMMON_KEYCODES.keys())
-            keycode_labels = [f"{COMMON_KEYCODES[k]['name']} ({k})" for k in keycode_options]
-            
-            selected_key_index = st.selectbox(
-                "選擇按鍵",
-                options=range(len(keycode_options)),
-                format_func=lambda i: keycode_labels[i],
-                key="sendkey_common_select"
-            )
-            selected_key = keycode_options[selected_key_index]
-            params['keycode'] = COMMON_KEYCODES[selected_key]['code']
-            st.caption(f"說明：{COMMON_KEYCODES[selected_key]['description']}")
-        else:
-            params['keycode'] = st.text_input(
-                "按鍵碼",
-                placeholder="KEYCODE_HOME 或 3",
-                help="輸入按鍵碼名稱或數字",
-                key="sendkey_custom"
-            )
-        
-        params['repeat'] = st.number_input(
-            "重複次數",
-            min_value=1,
-            max_value=10,
-            value=1,
-            key="sendkey_repeat"
-        )
-    
-    elif selected_type == ActionType.INSTALL_APK:
-        st.info("📦 安裝 APK")
-        
-        # 掃描 apks 目錄
-        apk_files = scan_apks_directory()
-        
-        if not apk_files:
-            st.warning("⚠️ apks 目錄中沒有找到 APK 文件")
-            st.caption(f"請將 APK 文件放到以下目錄：{get_apks_directory()}")
-            params['apk_path'] = ""
-        else:
-            # 創建選項列表（顯示文件名和創建時間）
-            apk_options = []
-            apk_paths = {}
-            
-            for file_path, file_name, created_time in apk_files:
-                # 格式化時間
-                time_str = created_time.strftime("%Y-%m-%d %H:%M:%S")
-                display_name = f"{file_name} ({time_str})"
-                apk_options.append(display_name)
-                apk_paths[display_name] = file_path
-            
-            selected_display = st.selectbox(
-                "選擇 APK 文件 *",
-                options=apk_options,
-                help="選擇要安裝的 APK 文件（顯示創建時間以便區分）",
-                key="install_apk_select"
-            )
-            
-            if selected_display:
-                params['apk_path'] = apk_paths[selected_display]
-                st.caption(f"📁 路徑：{params['apk_path']}")
-            else:
-                params['apk_path'] = ""
-        
-        params['replace'] = st.checkbox(
-            "替換已存在的應用",
-            value=True,
-            help="如果應用已安裝，是否替換安裝",
-            key="install_replace"
-        )
-        
-        params['grant_permissions'] = st.checkbox(
-            "自動授予權限",
-            value=False,
-            help="安裝時自動授予所有權限",
-            key="install_grant_permissions"
-        )
+    _PARAM_RENDERERS[selected_type](params, editing=False, key_prefix=f"new_{selected_type.value}_")
     
     st.markdown("---")
     
@@ -363,7 +472,7 @@ def add_action_dialog():
                 return
             
             # 創建動作
-            action = st.session_state.action_registry.create_action(
+            action = ss.action_registry.create_action(
                 name=name,
                 action_type=selected_type,
                 params=params,
@@ -373,8 +482,8 @@ def add_action_dialog():
             if action:
                 st.success(f"✅ 動作已創建：{action.display_name}")
                 logger.info(f"✅ 創建動作成功: {action.display_name}")
-                st.session_state.show_add_action_dialog = False
-                st.session_state.new_action_type = ActionType.WAKE_UP  # 重置類型
+                ss.active_action_dialog = None
+                ss.new_action_type = ActionType.WAKE_UP  # 重置類型
                 time.sleep(0.5)
                 st.rerun()
             else:
@@ -382,23 +491,14 @@ def add_action_dialog():
     
     with col2:
         if st.button("❌ 取消", use_container_width=True, key="add_action_cancel"):
-            st.session_state.show_add_action_dialog = False
-            st.session_state.new_action_type = ActionType.WAKE_UP  # 重置類型
+            ss.active_action_dialog = None
+            ss.new_action_type = ActionType.WAKE_UP  # 重置類型
             st.rerun()
 
 
 @st.dialog("✏️ 編輯動作", width="large")
 def edit_action_dialog(action: Action):
     """編輯動作對話框"""
-    # 隱藏對話框關閉按鈕
-    st.markdown("""
-        <style>
-        button[kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     st.caption(f"動作 ID: {action.action_id}")
     st.caption(f"類型: {action.type_name}")
     
@@ -424,153 +524,10 @@ def edit_action_dialog(action: Action):
         
         params = action.params.copy()
         
-        # 根據動作類型顯示參數編輯界面
-        # （與新增對話框類似，但使用現有值）
-        if action.action_type == ActionType.WAKE_UP:
-            params['verify'] = st.checkbox("驗證喚醒成功", value=params.get('verify', True))
-        
-        elif action.action_type == ActionType.SLEEP:
-            params['force'] = st.checkbox("強制休眠", value=params.get('force', False))
-            params['verify'] = st.checkbox("驗證休眠成功", value=params.get('verify', True))
-        
-        elif action.action_type == ActionType.KEEP_AWAKE:
-            mode_options = {
-                0: "禁用（預設值）",
-                1: "僅 AC 充電時保持喚醒",
-                2: "僅 USB 充電時保持喚醒",
-                3: "AC 和 USB 充電時保持喚醒（推薦）"
-            }
-            
-            current_mode = params.get('mode', 3)
-            mode_index = st.selectbox(
-                "喚醒模式 *",
-                options=list(mode_options.keys()),
-                format_func=lambda x: mode_options[x],
-                index=list(mode_options.keys()).index(current_mode) if current_mode in mode_options else 3,
-                help="選擇設備在接電源時保持喚醒的模式"
-            )
-            params['mode'] = mode_index
-            
-            st.markdown("---")
-            st.markdown("**說明**")
-            st.markdown("- **模式 0**: 禁用此功能，設備會按正常的閒置計時器進入深度睡眠")
-            st.markdown("- **模式 1**: 僅在使用牆上充電器（AC）時保持喚醒")
-            st.markdown("- **模式 2**: 僅在連接電腦 USB 充電時保持喚醒")
-            st.markdown("- **模式 3**: AC 和 USB 充電時都保持喚醒，確保網路功能不被關閉（推薦）")
-        
-        elif action.action_type == ActionType.LAUNCH_APP:
-            params['package'] = st.text_input(
-                "Package 名稱 *",
-                value=params.get('package', ''),
-                placeholder="com.example.app"
-            )
-            params['activity'] = st.text_input(
-                "Activity 名稱（選填）",
-                value=params.get('activity', ''),
-                placeholder=".MainActivity"
-            )
-            params['stop_existing'] = st.checkbox("啟動前先關閉已運行的實例", value=params.get('stop_existing', False))
-            params['wait'] = st.checkbox("等待啟動完成", value=params.get('wait', True))
-        
-        elif action.action_type == ActionType.STOP_APP:
-            params['package'] = st.text_input(
-                "Package 名稱 *",
-                value=params.get('package', ''),
-                placeholder="com.example.app"
-            )
-            params['method'] = st.selectbox(
-                "關閉方式",
-                options=["force-stop", "kill"],
-                index=0 if params.get('method') == 'force-stop' else 1
-            )
-            params['verify'] = st.checkbox("驗證關閉成功", value=params.get('verify', True))
-        
-        elif action.action_type == ActionType.RESTART_APP:
-            params['package'] = st.text_input(
-                "Package 名稱 *",
-                value=params.get('package', ''),
-                placeholder="com.example.app"
-            )
-            params['activity'] = st.text_input(
-                "Activity 名稱（選填）",
-                value=params.get('activity', ''),
-                placeholder=".MainActivity"
-            )
-            params['delay'] = st.number_input(
-                "重啟延遲（秒）",
-                min_value=0,
-                max_value=10,
-                value=params.get('delay', 1)
-            )
-        
-        elif action.action_type == ActionType.SEND_KEY:
-            keycode_value = params.get('keycode', '')
-            params['keycode'] = st.text_input(
-                "按鍵碼",
-                value=str(keycode_value),
-                placeholder="KEYCODE_HOME 或 3"
-            )
-            params['repeat'] = st.number_input(
-                "重複次數",
-                min_value=1,
-                max_value=10,
-                value=params.get('repeat', 1)
-            )
-        
-        elif action.action_type == ActionType.INSTALL_APK:
-            # 掃描 apks 目錄
-            apk_files = scan_apks_directory()
-            
-            if not apk_files:
-                st.warning("⚠️ apks 目錄中沒有找到 APK 文件")
-                st.caption(f"請將 APK 文件放到以下目錄：{get_apks_directory()}")
-                params['apk_path'] = params.get('apk_path', '')
-            else:
-                # 創建選項列表（顯示文件名和創建時間）
-                apk_options = []
-                apk_paths = {}
-                
-                for file_path, file_name, created_time in apk_files:
-                    # 格式化時間
-                    time_str = created_time.strftime("%Y-%m-%d %H:%M:%S")
-                    display_name = f"{file_name} ({time_str})"
-                    apk_options.append(display_name)
-                    apk_paths[display_name] = file_path
-                
-                # 找到當前選擇的 APK（如果存在）
-                current_apk_path = params.get('apk_path', '')
-                current_index = 0
-                if current_apk_path:
-                    # 嘗試找到匹配的路徑
-                    for i, (file_path, _, _) in enumerate(apk_files):
-                        if file_path == current_apk_path or str(file_path) == current_apk_path:
-                            current_index = i
-                            break
-                
-                selected_display = st.selectbox(
-                    "選擇 APK 文件 *",
-                    options=apk_options,
-                    index=current_index if current_index < len(apk_options) else 0,
-                    help="選擇要安裝的 APK 文件（顯示創建時間以便區分）"
-                )
-                
-                if selected_display:
-                    params['apk_path'] = apk_paths[selected_display]
-                    st.caption(f"📁 路徑：{params['apk_path']}")
-                else:
-                    params['apk_path'] = ""
-            
-            params['replace'] = st.checkbox(
-                "替換已存在的應用",
-                value=params.get('replace', True),
-                help="如果應用已安裝，是否替換安裝"
-            )
-            
-            params['grant_permissions'] = st.checkbox(
-                "自動授予權限",
-                value=params.get('grant_permissions', False),
-                help="安裝時自動授予所有權限"
-            )
+        # 根據動作類型顯示參數編輯界面（與新增對話框共用渲染函式，使用現有值）
+        _PARAM_RENDERERS[ActionType(action.action_type)](
+            params, editing=True, key_prefix=f"edit_{action.action_id}_"
+        )
         
         st.markdown("---")
         
@@ -582,7 +539,7 @@ def edit_action_dialog(action: Action):
             cancelled = st.form_submit_button("❌ 取消", use_container_width=True)
         
         if cancelled:
-            st.session_state[f'edit_action_{action.action_id}'] = False
+            close_action_dialog()
             st.rerun()
         
         if submitted:
@@ -604,7 +561,7 @@ def edit_action_dialog(action: Action):
             if st.session_state.action_registry.update_action(action):
                 st.success(f"✅ 動作已更新：{action.display_name}")
                 logger.info(f"✅ 更新動作成功: {action.display_name}")
-                st.session_state[f'edit_action_{action.action_id}'] = False
+                close_action_dialog()
                 time.sleep(0.5)
                 st.rerun()
             else:
@@ -614,15 +571,6 @@ def edit_action_dialog(action: Action):
 @st.dialog("🗑️ 確認刪除", width="small")
 def delete_action_dialog(action: Action):
     """刪除動作確認對話框"""
-    # 隱藏對話框關閉按鈕
-    st.markdown("""
-        <style>
-        button[kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     st.warning(f"確定要刪除動作 **{action.display_name}** 嗎？")
     st.caption(f"類型：{action.type_name}")
     
@@ -636,7 +584,7 @@ def delete_action_dialog(action: Action):
             if st.session_state.action_registry.delete_action(action.action_id):
                 st.success("✅ 動作已刪除")
                 logger.info(f"🗑️ 刪除動作: {action.display_name}")
-                st.session_state[f'delete_action_{action.action_id}'] = False
+                close_action_dialog()
                 time.sleep(0.5)
                 st.rerun()
             else:
@@ -644,22 +592,13 @@ def delete_action_dialog(action: Action):
     
     with col2:
         if st.button("❌ 取消", use_container_width=True):
-            st.session_state[f'delete_action_{action.action_id}'] = False
+            close_action_dialog()
             st.rerun()
 
 
 @st.dialog("▶️ 執行動作", width="medium")
 def execute_action_dialog(action: Action):
     """執行動作對話框（選擇設備）"""
-    # 隱藏對話框關閉按鈕
-    st.markdown("""
-        <style>
-        button[kind="header"] {
-            display: none !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     st.subheader(f"{action.display_name}")
     st.caption(f"類型：{action.type_name}")
     
@@ -676,19 +615,19 @@ def execute_action_dialog(action: Action):
     if not online_devices:
         st.warning("⚠️ 沒有在線設備")
         if st.button("關閉"):
-            st.session_state[f'execute_action_{action.action_id}'] = False
+            close_action_dialog()
             st.rerun()
         return
     
     # 設備選擇
-    device_options = {d.device_id: d.display_name for d in online_devices}
+    device_by_id = {d.device_id: d for d in online_devices}
     selected_device_id = st.selectbox(
         "設備",
-        options=list(device_options.keys()),
-        format_func=lambda did: device_options[did]
+        options=list(device_by_id.keys()),
+        format_func=lambda did: device_by_id[did].display_name
     )
     
-    selected_device = next(d for d in online_devices if d.device_id == selected_device_id)
+    selected_device = device_by_id[selected_device_id]
     
     st.markdown("---")
     
@@ -727,17 +666,41 @@ def execute_action_dialog(action: Action):
                     logger.error(f"❌ 執行動作失敗: {action.display_name} -> {selected_device.display_name}")
                 
                 time.sleep(1.5)
-                st.session_state[f'execute_action_{action.action_id}'] = False
+                close_action_dialog()
                 st.rerun()
     
     with col2:
         if st.button("❌ 取消", use_container_width=True):
-            st.session_state[f'execute_action_{action.action_id}'] = False
+            close_action_dialog()
             st.rerun()
 
 
-def render_action_card(action: Action):
-    """渲染動作卡片"""
+def _format_age(now: float, last_epoch: float) -> str:
+    """
+    格式化距今時間
+    
+    Args:
+        now: 當前時間（epoch 秒數），由呼叫端統一取得一次
+        last_epoch: 上次時間（epoch 秒數）
+    """
+    delta = now - last_epoch
+    if delta >= 86400:
+        return f"{int(delta // 86400)} 天前"
+    if delta >= 3600:
+        return f"{int(delta // 3600)} 小時前"
+    if delta >= 60:
+        return f"{int(delta // 60)} 分鐘前"
+    return "剛剛"
+
+
+def render_action_card(action: Action, now: float):
+    """
+    渲染動作卡片
+    
+    Args:
+        action: 動作
+        now: 當前時間（epoch 秒數），由 render_action_list 統一取得一次
+    """
     with st.container(border=True):
         # 頂部：標題和選單
         col1, col2 = st.columns([5, 1])
@@ -746,39 +709,46 @@ def render_action_card(action: Action):
             st.markdown(f"### {action.display_name}")
             st.caption(f"類型：{action.type_name}")
         
+        # 選單與參數詳情只在使用者展開時才渲染（未展開的卡片不產生這些元件）
+        menu_key = f'card_menu_{action.action_id}'
         with col2:
-            # 操作選單
-            with st.popover("⋮", use_container_width=False):
+            if st.button("⋮", key=f"menu_{action.action_id}", help="操作選單"):
+                st.session_state[menu_key] = not st.session_state.get(menu_key, False)
+        
+        # 操作選單
+        if st.session_state.get(menu_key, False):
+            with st.container(border=True):
                 st.markdown("**操作選單**")
+                mcol1, mcol2, mcol3, mcol4 = st.columns(4)
                 
-                if st.button("▶️ 執行", key=f"exec_{action.action_id}", use_container_width=True):
-                    st.session_state[f'execute_action_{action.action_id}'] = True
-                    st.rerun()
-                
-                if st.button("✏️ 編輯", key=f"edit_{action.action_id}", use_container_width=True):
-                    st.session_state[f'edit_action_{action.action_id}'] = True
-                    st.rerun()
+                with mcol1:
+                    st.button("▶️ 執行", key=f"exec_{action.action_id}", use_container_width=True,
+                              on_click=open_action_dialog, args=('execute', action.action_id, menu_key))
                 
-                if st.button("📋 複製", key=f"copy_{action.action_id}", use_container_width=True):
-                    new_action = st.session_state.action_registry.duplicate_action(action.action_id)
-                    if new_action:
-                        st.success(f"✅ 已複製：{new_action.name}")
-                        time.sleep(1)
-                        st.rerun()
+                with mcol2:
+                    st.button("✏️ 編輯", key=f"edit_{action.action_id}", use_container_width=True,
+                              on_click=open_action_dialog, args=('edit', action.action_id, menu_key))
                 
-                st.divider()
+                with mcol3:
+                    if st.button("📋 複製", key=f"copy_{action.action_id}", use_container_width=True):
+                        new_action = st.session_state.action_registry.duplicate_action(action.action_id)
+                        if new_action:
+                            st.session_state[menu_key] = False
+                            st.success(f"✅ 已複製：{new_action.name}")
+                            time.sleep(1)
+                            st.rerun()
                 
-                if st.button("🗑️ 刪除", key=f"del_{action.action_id}", use_container_width=True, type="secondary"):
-                    st.session_state[f'delete_action_{action.action_id}'] = True
-                    st.rerun()
+                with mcol4:
+                    st.button("🗑️ 刪除", key=f"del_{action.action_id}", use_container_width=True, type="secondary",
+                              on_click=open_action_dialog, args=('delete', action.action_id, menu_key))
         
         # 動作說明
         if action.description:
             st.markdown(f"*{action.description}*")
         
         # 參數預覽
-        if action.params:
-            with st.expander("📋 參數詳情"):
+        if action.params and st.toggle("📋 參數詳情", key=f"card_params_{action.action_id}"):
+            with st.container(border=True):
                 for key, value in action.params.items():
                     if value:  # 只顯示非空值
                         st.text(f"{key}: {value}")
@@ -795,19 +765,39 @@ def render_action_card(action: Action):
         
         with col3:
             if action.last_executed_at:
-                from datetime import datetime
-                time_diff = datetime.now() - action.last_executed_at
-                if time_diff.days > 0:
-                    last_exec = f"{time_diff.days} 天前"
-                elif time_diff.seconds >= 3600:
-                    last_exec = f"{time_diff.seconds // 3600} 小時前"
-                elif time_diff.seconds >= 60:
-                    last_exec = f"{time_diff.seconds // 60} 分鐘前"
-                else:
-                    last_exec = "剛剛"
+                last_exec = _format_age(now, action.last_executed_at.timestamp())
                 st.caption(f"最後執行：{last_exec}")
 
 
+@st.fragment
+def render_action_list(actions: List[Action]):
+    """
+    渲染動作卡片網格與各動作的對話框（fragment）
+    
+    卡片上的按鈕只會重新執行此 fragment，不會重跑整個頁面；
+    對話框在卡片渲染之後於 fragment 內分派，同一次執行內即可開啟
+    """
+    # 當前時間只計算一次，供所有卡片共用
+    now = time.time()
+    
+    # 使用網格佈局（每行 2 個卡片）
+    for i in range(0, len(actions), 2):
+        cols = st.columns(2)
+        
+        for j, col in enumerate(cols):
+            if i + j < len(actions):
+                with col:
+                    render_action_card(actions[i + j], now)
+    
+    # 處理對話框：只查一次目前打開的對話框
+    active = st.session_state.active_action_dialog
+    if active is not None and active[0] in ACTION_DIALOG_HANDLERS:
+        kind, action_id = active
+        action = next((a for a in actions if a.action_id == action_id), None)
+        if action is not None:
+            ACTION_DIALOG_HANDLERS[kind](action)
+
+
 def main():
     """主函式"""
     st.title("⚡ 動作管理")
@@ -828,43 +818,46 @@ def main():
     
     with col2:
         # 類型篩選
-        filter_options = ["全部"] + [ACTION_TYPE_NAMES[t] for t in ActionType]
         filter_type = st.selectbox(
             "類型篩選",
-            options=filter_options,
-            index=filter_options.index(st.session_state.filter_type) if st.session_state.filter_type in filter_options else 0,
+            options=_FILTER_OPTIONS,
+            index=_FILTER_INDEX.get(st.session_state.filter_type, 0),
             label_visibility="collapsed"
         )
         st.session_state.filter_type = filter_type
     
     with col3:
-        if st.button("➕ 新增動作", use_container_width=True, type="primary"):
-            st.session_state.show_add_action_dialog = True
+        if st.button("➕ 新增動作", use_container_width=True, type="primary",
+                     on_click=open_action_dialog, args=('add',)):
             st.session_state.new_action_type = ActionType.WAKE_UP  # 重置為第一個類型
-            st.rerun()
     
     st.markdown("---")
     
-    # 獲取動作列表
-    if search_keyword:
-        actions = st.session_state.action_registry.search_actions(search_keyword)
-    else:
-        actions = st.session_state.action_registry.get_all_actions()
-    
-    # 類型篩選
-    if filter_type != "全部":
-        # 找到對應的 ActionType
-        selected_type = next((t for t in ActionType if ACTION_TYPE_NAMES[t] == filter_type), None)
-        if selected_type:
-            actions = [a for a in actions if a.action_type == selected_type]
+    # 獲取動作列表：關鍵字與類型篩選合併為單次遍歷
+    keyword = search_keyword.strip().lower()
+    selected_type = _FILTER_NAME_TO_TYPE.get(filter_type)  # None 表示全部
+    actions = st.session_state.action_registry.get_all_actions()
+    if keyword or selected_type is not None:
+        actions = [
+            a for a in actions
+            if (not keyword or keyword in a.search_text)
+            and (selected_type is None or a.action_type == selected_type)
+        ]
     
     # 顯示統計
     if actions:
         col1, col2, col3, col4 = st.columns(4)
         
-        total_actions = len(actions)
-        total_executions = sum(a.execution_count for a in actions)
-        total_success = sum(a.success_count for a in actions)
+        if search_keyword or filter_type != "全部":
+            # 有篩選時只統計篩選後的子集
+            total_actions = len(actions)
+            total_executions = sum(a.execution_count for a in actions)
+            total_success = sum(a.success_count for a in actions)
+        else:
+            registry = st.session_state.action_registry
+            total_actions = registry.count()
+            total_executions = registry.total_executions()
+            total_success = registry.total_success()
         overall_success_rate = (total_success / total_executions * 100) if total_executions > 0 else 0
         
         col1.metric("📊 動作總數", total_actions)
@@ -881,28 +874,20 @@ def main():
         else:
             st.info("📝 還沒有任何動作，點擊「新增動作」開始創建")
     else:
-        # 使用網格佈局（每行 2 個卡片）
-        for i in range(0, len(actions), 2):
-            cols = st.columns(2)
-            
-            for j, col in enumerate(cols):
-                if i + j < len(actions):
-                    with col:
-                        render_action_card(actions[i + j])
+        render_action_list(actions)
     
-    # 處理對話框
-    if st.session_state.get('show_add_action_dialog'):
+    # 新增動作對話框由頁首按鈕開啟，在主流程分派
+    active = st.session_state.active_action_dialog
+    if active is not None and active[0] == 'add':
         add_action_dialog()
-    
-    for action in actions:
-        if st.session_state.get(f'edit_action_{action.action_id}'):
-            edit_action_dialog(action)
-        
-        if st.session_state.get(f'delete_action_{action.action_id}'):
-            delete_action_dialog(action)
-        
-        if st.session_state.get(f'execute_action_{action.action_id}'):
-            execute_action_dialog(action)
+
+
+# 對話框類型 -> 對話框函式（新增對話框不需要 action，由 main 直接處理）
+ACTION_DIALOG_HANDLERS = {
+    'edit': edit_action_dialog,
+    'delete': delete_action_dialog,
+    'execute': execute_action_dialog,
+}
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
+import asyncio
 import logging
 import sys
-import time
 from pathlib import Path
 from unittest.mock import MagicMock
 
@@ -14,20 +14,27 @@ sys.modules['core.adb_manager'] = MagicMock()
 from core.game_server_manager import GameServerManager
 from core.adb_manager import ADBManager
 
+# Intent Extras 的 am 參數 flag（依值的確切類型分派，bool 不會被當成 int）
+_ADB_EXTRA_FLAGS = {bool: "--ez", int: "--ei", float: "--ef", str: "--es"}
+
 # 指向實際的 Server 位置
 SERVER_PATH = Path("/Users/jinyaolin/androidgame/server")
 
-def test_integration():
+async def test_integration():
     print("=== 開始整合測試 ===")
+    loop = asyncio.get_running_loop()
     
     # 1. 初始化 Manager
     server_manager = GameServerManager(SERVER_PATH)
     adb_manager = ADBManager()
     
-    # 2. 模擬啟動房間
+    # 2. 模擬啟動房間（同時查詢 ADB 設備列表，兩者互不依賴）
     room_id = "test_room_1"
-    print(f"[Step 1] 啟動 Game Server (Room: {room_id})...")
-    port = server_manager.start_server(room_id)
+    print(f"[Step 1] 啟動 Game Server (Room: {room_id}) 並查詢 ADB 設備...")
+    port, _ = await asyncio.gather(
+        loop.run_in_executor(None, server_manager.start_server, room_id),
+        loop.run_in_executor(None, adb_manager.get_devices),
+    )
     
     if not port:
         print("❌ Server 啟動失敗")
@@ -49,35 +56,46 @@ def test_integration():
     
     # 呼叫我們剛剛新增的方法 (雖然是 Mock，但確認方法簽名存在)
     # 注意：因為我們 Mock 了 ADBManager，這裡實際上不會執行 ADB 指令，但可以測試程式碼邏輯是否正確
-    try:
-        # 暫時替換 Mock 的方法為真實的打印，以便我們看到效果
-        def mock_launch(device, package, activity, extras):
-            cmd = f"am start -n {package}/{activity}"
-            for k, v in extras.items():
-                if isinstance(v, int):
-                    cmd += f" --ei {k} {v}"
-                else:
-                    cmd += f" --es {k} \"{v}\""
-            print(f"   -> [ADB Command]: adb -s {device} shell {cmd}")
-            return True, "Mock Success"
-            
-        adb_manager.launch_app_with_extras = mock_launch
-        
-        adb_manager.launch_app_with_extras(
-            device_serial,
-            "com.example.boardgame",
-            ".MainActivity",
-            extras
-        )
-        print("✅ App 啟動指令已發送")
+    # 暫時替換 Mock 的方法為真實的打印，以便我們看到效果
+    def mock_launch(device, package, activity, extras):
+        parts = [f"am start -n {package}/{activity}"]
+        for k, v in extras.items():
+            flag = _ADB_EXTRA_FLAGS.get(type(v), "--es")
+            if flag == "--ez":
+                v = "true" if v else "false"
+            elif flag == "--es":
+                v = f"\"{v}\""
+            parts.append(f" {flag} {k} {v}")
+        cmd = "".join(parts)
+        print(f"   -> [ADB Command]: adb -s {device} shell {cmd}")
+        return True, "Mock Success"
         
-    except Exception as e:
-        print(f"❌ ADB 指令發送失敗: {e}")
+    adb_manager.launch_app_with_extras = mock_launch
+    
+    def launch_app():
+        try:
+            adb_manager.launch_app_with_extras(
+                device_serial,
+                "com.example.boardgame",
+                ".MainActivity",
+                extras
+            )
+            print("✅ App 啟動指令已發送")
+        except Exception as e:
+            print(f"❌ ADB 指令發送失敗: {e}")
     
-    # 4. 等待並清理
-    print("[Step 3] 等待 3 秒模擬遊戲運行...")
-    time.sleep(3)
+    # 4. App 啟動指令與等待 Server 就緒同時進行（啟動指令不需要等 Server 就緒）
+    print("[Step 3] 等待 Server 開始接受連線...")
+    _, ready = await asyncio.gather(
+        loop.run_in_executor(None, launch_app),
+        loop.run_in_executor(None, server_manager.wait_until_ready, room_id),
+    )
+    if ready:
+        print("✅ Server 已就緒")
+    else:
+        print("❌ Server 未能就緒")
     
+    # 5. 清理
     print("[Step 4] 停止 Game Server...")
     server_manager.stop_server(room_id)
     print("✅ Server 已停止")
@@ -85,4 +103,4 @@ def test_integration():
     print("=== 測試完成 ===")
 
 if __name__ == "__main__":
-    test_integration()
+    asyncio.run(test_integration())
@@ -1,5 +1,4 @@
 from pathlib import Path
-import time
 from core.game_server_manager import GameServerManager
 
 # 假設 Board Game Server 在這個路徑 (請根據實際情況修改)
@@ -17,8 +16,9 @@ def main():
     if port:
         print(f"✅ Server 啟動成功，Port: {port}")
         
-        # 保持運行一段時間
-        time.sleep(5)
+        # 等待 Server 開始接受連線
+        if not manager.wait_until_ready(room_id):
+            print("❌ Server 未能就緒")
         
         info = manager.get_server_info(room_id)
         print(f"Server 狀態: {info}")
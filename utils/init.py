@@ -3,10 +3,68 @@
 確保所有頁面都能正確初始化核心組件
 """
 import streamlit as st
-from utils.logger import get_logger
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Set
+from utils.logger import get_logger, configure_file_logging
 
 logger = get_logger(__name__)
 
+# session_state 中表示本 session 已完成初始化的鍵
+_INIT_KEY = 'initialized'
+
+# 自動啟動房間 Socket Server 時的最大並發數
+SOCKET_BOOTSTRAP_WORKERS = 8
+
+# 核心模組在載入時一次導入；缺少依賴時記錄錯誤，由各 ensure_* 函數回報初始化失敗
+try:
+    from core.adb_manager import ADBManager
+    from core.device_registry import DeviceRegistry
+    from core.action_registry import ActionRegistry
+    from core.room_registry import RoomRegistry
+    from core.socket_server_manager import get_socket_server_manager
+    _core_import_error: Optional[ImportError] = None
+except ImportError as e:
+    logger.error(f"❌ 導入核心模組失敗: {e}")
+    _core_import_error = e
+
+
+def _require_core():
+    """核心模組導入失敗時拋出原始的 ImportError"""
+    if _core_import_error is not None:
+        raise _core_import_error
+
+
+# ==================== 共用服務實例 ====================
+# 以 st.cache_resource 在整個進程中只建立一次，所有 session 共用；
+# session_state 中只保留對同一實例的引用（避免每個 session 各自建立執行緒池與資料庫連接）
+
+@st.cache_resource(show_spinner=False)
+def get_adb_manager():
+    """取得共用的 ADB 管理器"""
+    _require_core()
+    return ADBManager()
+
+
+@st.cache_resource(show_spinner=False)
+def get_device_registry():
+    """取得共用的設備註冊表"""
+    _require_core()
+    return DeviceRegistry()
+
+
+@st.cache_resource(show_spinner=False)
+def get_action_registry():
+    """取得共用的動作註冊管理器"""
+    _require_core()
+    return ActionRegistry()
+
+
+@st.cache_resource(show_spinner=False)
+def get_room_registry():
+    """取得共用的房間註冊管理器"""
+    _require_core()
+    return RoomRegistry()
+
 
 def ensure_initialization():
     """
@@ -15,40 +73,45 @@ def ensure_initialization():
     
     這個函數應該在每個頁面開始時調用
     """
-    if 'initialized' not in st.session_state or not st.session_state.initialized:
-        logger.info("檢測到系統未初始化，開始自動初始化...")
+    # 已初始化的 session（最常見的情況）只需一次字典查詢
+    ss = st.session_state
+    if ss.get(_INIT_KEY):
+        return True
+    
+    # Streamlit 應用才需要檔案日誌（已註冊時立即返回）
+    configure_file_logging()
+    
+    logger.info("檢測到系統未初始化，開始自動初始化...")
+    
+    try:
+        # 初始化核心組件（引用進程內共用的實例）
+        ss['adb_manager'] = get_adb_manager()
+        ss['device_registry'] = get_device_registry()
         
-        try:
-            from core.adb_manager import ADBManager
-            from core.device_registry import DeviceRegistry
-            
-            # 初始化核心組件
-            st.session_state.adb_manager = ADBManager()
-            st.session_state.device_registry = DeviceRegistry()
-            
-            st.session_state.initialized = True
-            logger.info("✅ 系統自動初始化成功")
-            
-        except Exception as e:
-            logger.error(f"❌ 系統初始化失敗: {e}")
-            st.error(f"⚠️ 系統初始化失敗: {e}")
-            st.error("請檢查 ADB 是否正確安裝，或返回首頁重試")
-            
-            if st.button("返回首頁"):
-                st.switch_page("app.py")
-            
-            st.stop()
-            return False
+        ss[_INIT_KEY] = True
+        logger.info("✅ 系統自動初始化成功")
+        
+    except Exception as e:
+        logger.error(f"❌ 系統初始化失敗: {e}")
+        st.error(f"⚠️ 系統初始化失敗: {e}")
+        st.error("請檢查 ADB 是否正確安裝，或返回首頁重試")
+        
+        if st.button("返回首頁"):
+            st.switch_page("app.py")
+        
+        st.stop()
+        return False
     
     return True
 
 
 def ensure_action_registry():
     """確保動作註冊管理器已初始化"""
-    if 'action_registry' not in st.session_state:
+    # 只做一次成員檢查，並以字典方式寫入（不經過屬性代理）
+    ss = st.session_state
+    if 'action_registry' not in ss:
         try:
-            from core.action_registry import ActionRegistry
-            st.session_state.action_registry = ActionRegistry()
+            ss['action_registry'] = get_action_registry()
             logger.debug("動作註冊管理器已初始化")
         except Exception as e:
             logger.error(f"動作註冊管理器初始化失敗: {e}")
@@ -58,10 +121,10 @@ def ensure_action_registry():
 
 def ensure_room_registry():
     """確保房間註冊管理器已初始化"""
-    if 'room_registry' not in st.session_state:
+    ss = st.session_state
+    if 'room_registry' not in ss:
         try:
-            from core.room_registry import RoomRegistry
-            st.session_state.room_registry = RoomRegistry()
+            ss['room_registry'] = get_room_registry()
             logger.debug("房間註冊管理器已初始化")
         except Exception as e:
             logger.error(f"房間註冊管理器初始化失敗: {e}")
@@ -69,42 +132,102 @@ def ensure_room_registry():
     return True
 
 
+@st.cache_resource(show_spinner=False)
+def _started_socket_rooms() -> Set[str]:
+    """已確認啟動 Socket Server 的房間 ID（進程內共用）"""
+    return set()
+
+
+def invalidate_started_rooms(room_id: Optional[str] = None):
+    """
+    使已啟動記錄失效，下一次 ensure_socket_server_manager 會重新檢查並啟動
+    
+    用於 Socket Server 被外部終止後重新同步
+    
+    Args:
+        room_id: 只移除指定房間的記錄，None 表示清除全部
+    """
+    started = _started_socket_rooms()
+    if room_id is None:
+        started.clear()
+    else:
+        started.discard(room_id)
+    _bootstrap_socket_servers.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def _bootstrap_socket_servers() -> bool:
+    """
+    啟動所有已配置 IP 和 Port 的房間 Socket Server
+    
+    以 st.cache_resource 在每個進程只執行一次，不會在每次重新執行時重新掃描所有房間；
+    之後新增/編輯房間時由對應的對話框自行啟動或重啟。
+    有房間啟動失敗時拋出 RuntimeError（結果不會被快取），下一次執行只重試失敗的房間
+    """
+    room_registry = get_room_registry()
+    socket_manager = get_socket_server_manager()
+    started = _started_socket_rooms()
+    
+    pending = []
+    for room in room_registry.get_all_rooms():
+        # 只處理尚未確認啟動、且配置了 IP 和 Port 的房間
+        if room.room_id in started or not (room.socket_ip and room.socket_port):
+            continue
+        # 檢查是否已在運行
+        if socket_manager.is_server_running(room.room_id):
+            started.add(room.room_id)
+            continue
+        pending.append(room)
+    
+    if not pending:
+        return True
+    
+    failed = []
+    # 每次啟動都要等待進程確認存活，並發啟動使總耗時接近單次啟動而非房間數倍
+    with ThreadPoolExecutor(max_workers=min(SOCKET_BOOTSTRAP_WORKERS, len(pending)), thread_name_prefix='socket-bootstrap') as executor:
+        futures = {
+            executor.submit(
+                socket_manager.start_server,
+                room.room_id,
+                room.name,
+                room.socket_ip,
+                room.socket_port
+            ): room
+            for room in pending
+        }
+        for future in as_completed(futures):
+            room = futures[future]
+            success, msg = future.result()
+            if success:
+                started.add(room.room_id)
+                logger.info(f"✅ 自動啟動 Socket Server: {room.name}")
+            else:
+                logger.warning(f"⚠️ 自動啟動 Socket Server 失敗: {room.name} - {msg}")
+                failed.append(room.name)
+    
+    if failed:
+        raise RuntimeError(f"{len(failed)} 個房間的 Socket Server 未啟動: {', '.join(failed)}")
+    
+    return True
+
+
 def ensure_socket_server_manager():
     """確保 Socket Server 管理器已初始化並啟動所有房間的服務器"""
-    if 'socket_server_manager' not in st.session_state:
+    ss = st.session_state
+    if 'socket_server_manager' not in ss:
         try:
-            from core.socket_server_manager import get_socket_server_manager
-            st.session_state.socket_server_manager = get_socket_server_manager()
+            _require_core()
+            ss['socket_server_manager'] = get_socket_server_manager()
             logger.debug("Socket Server 管理器已初始化")
         except Exception as e:
             logger.error(f"Socket Server 管理器初始化失敗: {e}")
             return False
     
-    # 啟動所有房間的 Socket Server（確保 room_registry 已初始化）
+    # 啟動所有房間的 Socket Server（整個進程只執行一次）
     try:
         # 確保 room_registry 已初始化
         ensure_room_registry()
-        
-        if 'room_registry' in st.session_state:
-            room_registry = st.session_state.room_registry
-            socket_manager = st.session_state.socket_server_manager
-            
-            rooms = room_registry.get_all_rooms()
-            for room in rooms:
-                # 只啟動配置了 IP 和 Port 的房間
-                if room.socket_ip and room.socket_port:
-                    # 檢查是否已在運行
-                    if not socket_manager.is_server_running(room.room_id):
-                        success, msg = socket_manager.start_server(
-                            room.room_id,
-                            room.name,
-                            room.socket_ip,
-                            room.socket_port
-                        )
-                        if success:
-                            logger.info(f"✅ 自動啟動 Socket Server: {room.name}")
-                        else:
-                            logger.warning(f"⚠️ 自動啟動 Socket Server 失敗: {room.name} - {msg}")
+        _bootstrap_socket_servers()
     except Exception as e:
         logger.error(f"啟動房間 Socket Server 失敗: {e}")
     
@@ -1,49 +1,74 @@
 """
 日誌工具
 """
+import atexit
 import sys
+from functools import lru_cache
 from pathlib import Path
 from loguru import logger
 from config.settings import LOGS_DIR
 
+# 日誌格式
+CONSOLE_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+ERROR_FILE_FORMAT = FILE_FORMAT + "\n{exception}"
+
 # 移除預設 handler
 logger.remove()
 
 # 添加控制台輸出
 logger.add(
     sys.stdout,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+    format=CONSOLE_FORMAT,
     level="INFO"
 )
 
-# 添加檔案輸出 - 一般日誌
-logger.add(
-    LOGS_DIR / "qqquest_{time:YYYY-MM-DD}.log",
-    rotation="00:00",  # 每天午夜輪替
-    retention="30 days",  # 保留 30 天
-    encoding="utf-8",
-    level="DEBUG",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
-)
+# 檔案輸出延後到第一次需要時才註冊（命令列工具與測試腳本只需要控制台輸出）
+_file_sinks_added = False
 
-# 添加檔案輸出 - 錯誤日誌
-logger.add(
-    LOGS_DIR / "errors_{time:YYYY-MM-DD}.log",
-    rotation="00:00",
-    retention="90 days",  # 錯誤日誌保留更久
-    encoding="utf-8",
-    level="ERROR",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}\n{exception}"
-)
+
+def configure_file_logging():
+    """註冊每日輪替的檔案日誌輸出（一般日誌與錯誤日誌），重複呼叫不會重複註冊"""
+    global _file_sinks_added
+    if _file_sinks_added:
+        return
+    
+    # 添加檔案輸出 - 一般日誌
+    logger.add(
+        LOGS_DIR / "qqquest_{time:YYYY-MM-DD}.log",
+        rotation="00:00",  # 每天午夜輪替
+        retention="30 days",  # 保留 30 天
+        encoding="utf-8",
+        level="DEBUG",
+        enqueue=True,  # 由背景執行緒寫入檔案，呼叫端不必等待磁碟 I/O
+        format=FILE_FORMAT
+    )
+    
+    # 添加檔案輸出 - 錯誤日誌
+    logger.add(
+        LOGS_DIR / "errors_{time:YYYY-MM-DD}.log",
+        rotation="00:00",
+        retention="90 days",  # 錯誤日誌保留更久
+        encoding="utf-8",
+        level="ERROR",
+        enqueue=True,
+        format=ERROR_FILE_FORMAT
+    )
+    
+    # 結束時等待佇列中的日誌寫完
+    atexit.register(logger.complete)
+    
+    _file_sinks_added = True
 
 
+@lru_cache(maxsize=None)
 def get_logger(name: str):
-    """取得指定名稱的 logger"""
+    """取得指定名稱的 logger（依名稱快取，同名呼叫共用同一個綁定的 logger）"""
     return logger.bind(name=name)
 
 
 # 匯出
-__all__ = ['logger', 'get_logger']
+__all__ = ['logger', 'get_logger', 'configure_file_logging']
 
 
 
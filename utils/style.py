@@ -0,0 +1,23 @@
+"""
+頁面樣式工具
+"""
+import re
+
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_CSS_WHITESPACE_RE = re.compile(r"\s+")
+_CSS_PUNCT_SPACE_RE = re.compile(r"\s*([{}:;,>])\s*")
+
+
+def minify_css(css: str) -> str:
+    """
+    壓縮 <style> 區塊：移除註解並收合空白
+
+    頁面的樣式常數在模組載入時壓縮一次，之後每次執行送出的都是同一個精簡字串
+    """
+    css = _CSS_COMMENT_RE.sub("", css)
+    css = _CSS_WHITESPACE_RE.sub(" ", css)
+    return _CSS_PUNCT_SPACE_RE.sub(r"\1", css).strip()
+
+
+# 匯出
+__all__ = ['minify_css']